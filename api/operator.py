@@ -4,22 +4,36 @@
 # Imports
 from apscheduler.schedulers.background import BackgroundScheduler
 from django_apscheduler.jobstores import register_events, DjangoJobStore
+import logging
+
+from congress.models import SummaryStat
+from congress.signals import deferStats
+from congress.cache import bumpDataVersion
+from congress.populate import current as currentPopulate
 
 # Updates database every 24 hours
 def updateDB(): 
     logging.info("started update")
 
-    # update the database with the latest data from the official website
-    currentPopulate()
-    # log that the database update has been updated
-    logging.info("Finished populating recent congress trades")
-
-    # Get all summaryStats objects
-    summaryStats = SummaryStat.objects.all()
-
-    # For each summaryStat, update the stats with the latest data
-    for summaryStat in summaryStats:
-        summaryStat.updateStats()
+    try:
+        # update the database with the latest data from the official website
+        # this also updates the stats of the tickers and congress people that had new trades, and only those
+        # saves of tickers and congress people are batched into a single stats update at the end of the block
+        with deferStats():
+            tickerIds, congressPersonIds = currentPopulate()
+        # log that the database update has been updated
+        logging.info(f"Finished populating recent congress trades ({len(tickerIds)} tickers and {len(congressPersonIds)} congress people changed)")
+
+        # Get all summaryStats objects
+        summaryStats = SummaryStat.objects.all()
+
+        # For each summaryStat, update the stats with the latest data
+        for summaryStat in summaryStats:
+            summaryStat.updateStats()
+    finally:
+        # The data has changed, so the cached responses of the endpoints are no longer valid
+        # This also runs when the update fails part of the way, the pages that were committed before the failure have changed the data too
+        bumpDataVersion()
 
     # log that the database has been fully updated
     logging.info("Database Updated")
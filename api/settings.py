@@ -121,6 +121,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The responses of the government/ endpoints are cached until the next database update (see congress/cache.py), files are shared by every worker process
+# The data version and the throttle counters of the API are kept in this cache too
+# Files are only shared by the processes of one machine (or dyno), a deploy with more than one sets CACHE_BACKEND and CACHE_LOCATION to a shared cache (for example memcached)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', BASE_DIR / 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -0,0 +1,95 @@
+# Purpose: Cache the responses of the government/ endpoints until the data in the database changes
+
+# Imports
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.core.cache import cache
+from rest_framework.response import Response
+import hashlib
+import time
+
+# Cache key of the data version
+versionKey = 'congress:dataVersion'
+
+# Number of seconds a response stays in the cache (responses of an older data version are never read again, so they only have to expire eventually)
+responseTimeout = 60 * 60 * 24 * 2
+
+# DATA VERSION
+'''
+The data version is a number that changes every time the database is updated (see bumpDataVersion), and is part of the cache key of every response
+## Once the version changes the responses cached for the older version can no longer be reached, so nothing ever has to be purged
+## The version is the unix time (in seconds) of the update, so it also tells when the data last changed
+'''
+def dataVersion():
+    version = cache.get(versionKey)
+
+    # The version is missing when the cache was cleared (or is new), start a new one
+    if version is None:
+        cache.add(versionKey, int(time.time()), timeout=None)
+        version = cache.get(versionKey)
+
+    return version
+
+# Change the data version after the database has been updated, so every cached response becomes stale
+def bumpDataVersion():
+    # the version always moves forward, even when it is bumped twice in the same second
+    version = max(int(time.time()), (cache.get(versionKey) or 0) + 1)
+    cache.set(versionKey, version, timeout=None)
+    return version
+
+# Hash of the response to a request, made from the data version, the scheme and host, the full path (with the query string and its filter parameters) and the accepted content types
+# The scheme and host are part of the response as the next and previous links of a page are absolute urls
+# It is used as the cache key and as the ETag of the response, two requests with the same hash always get exactly the same response
+def responseHash(request, version):
+    accept = request.META.get('HTTP_ACCEPT', '')
+    return hashlib.sha256(f"{version}\n{request.scheme}://{request.get_host()}{request.get_full_path()}\n{accept}".encode('utf-8')).hexdigest()
+
+# CACHED RESPONSES
+'''
+Mixin for the viewsets of the government/ endpoints, the data of successful list and retrieve responses is cached until the data version changes
+A cached response is returned without running any query or serializer
+Responses also have an ETag (the response hash) and a Last-Modified header (the data version), so clients that send If-None-Match or If-Modified-Since get a 304 Not Modified response while the data has not changed, before the cache or the database is read
+The viewsets define their own retrieve (and list) methods, so the mixin wraps whichever method answers the request instead of overriding them
+'''
+class CachedResponseMixin:
+    # Answer a request with view (the list or retrieve method of the viewset), unless the client or the cache already has the response
+    def cachedResponse(self, view, request, *args, **kwargs):
+        version = dataVersion()
+        digest = responseHash(request, version)
+        etag = quote_etag(digest)
+
+        # Answer with 304 Not Modified if the client already has this response, then from the cache, and only then with the viewset
+        response = get_conditional_response(request, etag=etag, last_modified=version)
+        if response is None:
+            response = self.versionedResponse(view, f"congress:response:{digest}", request, *args, **kwargs)
+
+        # Errors (such as a ticker that does not exist) are not tied to the data version, so they do not get the headers
+        if response.status_code in (200, 304):
+            # Headers the client sends back to check if the response has changed
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(version)
+
+        return response
+
+    # Answer a request from the cache, or with view and cache its data
+    def versionedResponse(self, view, key, request, *args, **kwargs):
+        # Return the cached data if this request has already been answered for the current data version
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+
+        # Only successful responses are cached (errors, such as a ticker that does not exist, are not)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=responseTimeout)
+
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        # GET requests are answered by the list or retrieve method of the viewset, wrap it with the cache
+        if self.action_map.get('get') in ('list', 'retrieve') and request.method == 'GET':
+            view = self.get
+            self.get = lambda request, *args, **kwargs: self.cachedResponse(view, request, *args, **kwargs)
+
+        return super().dispatch(request, *args, **kwargs)
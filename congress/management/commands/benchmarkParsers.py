@@ -0,0 +1,55 @@
+# Purpose: Create a custom command to compare the speed of the report parsers using: "python manage.py benchmarkParsers"
+
+# Imports
+from django.core.management.base import BaseCommand, CommandError
+from pathlib import Path
+import time
+
+# Import the parsers to benchmark
+from ...scripts.parsers import parsers
+
+# Create custom command
+class Command(BaseCommand):
+    # Help message: "python manage.py benchmarkParsers --help"
+    help = 'Run every report parser over a corpus of saved periodic transaction report html pages and report rows per second'
+
+    def add_arguments(self, parser):
+        # Directory with the saved html pages, every *.html file in it (and its subdirectories) is parsed
+        parser.add_argument('--corpus', default='congress/scripts/data/ptr', help='Directory of saved periodic transaction report html pages')
+        # Number of times every page is parsed by every parser
+        parser.add_argument('--repeat', type=int, default=20, help='Number of times every page is parsed')
+        # Parsers to benchmark, the first one is the reference the output of the others is compared to
+        parser.add_argument('--parsers', nargs='+', default=list(parsers), choices=list(parsers), help='Parsers to benchmark')
+
+    def handle(self, *args, **options):
+        # Load the corpus
+        pages = [path.read_text(encoding='utf-8') for path in sorted(Path(options['corpus']).glob('**/*.html'))]
+
+        if len(pages) == 0:
+            raise CommandError(f"There are no html pages in {options['corpus']}")
+
+        self.stdout.write(f"Parsing {len(pages)} pages {options['repeat']} times with each parser")
+
+        # Rows of every page produced by the first parser, to check that the other parsers produce exactly the same rows
+        reference = None
+
+        for name in options['parsers']:
+            parse = parsers[name]
+
+            # Check the output of the parser before timing it
+            output = [parse(html, 'name', 'notificationDate', 'url') for html in pages]
+            if reference is None:
+                reference = output
+            mismatches = sum(1 for rows, expected in zip(output, reference) if rows != expected)
+
+            # Time the parser over the whole corpus
+            began = time.perf_counter()
+            for i in range(options['repeat']):
+                for html in pages:
+                    parse(html, 'name', 'notificationDate', 'url')
+            seconds = time.perf_counter() - began
+
+            rows = sum(len(page) for page in output) * options['repeat']
+            reports = len(pages) * options['repeat']
+
+            self.stdout.write(f"{name}: {reports / seconds:.1f} reports/s, {rows / seconds:.1f} rows/s, {mismatches} pages differ from {options['parsers'][0]}")
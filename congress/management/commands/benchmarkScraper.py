@@ -0,0 +1,58 @@
+# Purpose: Create a custom command to measure the throughput of the scraper against a local fake efdsearch website using: "python manage.py benchmarkScraper"
+
+# Imports
+from django.core.management.base import BaseCommand
+import time
+
+# Import the scraper and the fake website
+from ...scripts import senators
+from ...scripts.parsers import parsers
+from ...scripts.rateLimiter import RateLimiter
+from ...scripts.fakeEfdsearch import FakeEfdsearch
+
+# Create custom command
+class Command(BaseCommand):
+    # Help message: "python manage.py benchmarkScraper --help"
+    help = 'Run the scraper (bypassTOS, search, and report parsing) against a local fake efdsearch website and report reports/sec and rows/sec'
+
+    def add_arguments(self, parser):
+        # Fake website
+        parser.add_argument('--reports', type=int, default=500, help='Number of reports the fake website has')
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds every response of the fake website is delayed by')
+        parser.add_argument('--rate-limit', type=float, default=0, help='Requests per second the fake website accepts before answering 429 (0 for no limit)')
+        # Scraper
+        parser.add_argument('--workers', type=int, default=1, help='Number of reports fetched concurrently')
+        parser.add_argument('--parse-workers', type=int, default=0, help='Number of processes that parse reports (0 parses on the fetch workers)')
+        parser.add_argument('--parser', default=senators.parserBackend, choices=list(parsers), help='Parser used to parse the reports')
+        parser.add_argument('--initial-rate', type=float, default=RateLimiter().rate, help='Requests per second the rate limiter starts at')
+        parser.add_argument('--max-rate', type=float, default=RateLimiter().maxRate, help='Highest requests per second the rate limiter can speed up to')
+
+    def handle(self, *args, **options):
+        # Start the fake website
+        server = FakeEfdsearch(reports=options['reports'], latency=options['latency'], rateLimit=options['rate_limit'])
+        server.startInBackground()
+
+        # Point the scraper at the fake website, with a fresh rate limiter and without the response cache
+        senators.useWebsite(server.url)
+        senators.useCache(None)
+        senators.limiter = RateLimiter(rate=options['initial_rate'], maxRate=options['max_rate'])
+        senators.parserBackend = options['parser']
+
+        try:
+            reports = 0
+            rows = 0
+
+            began = time.perf_counter()
+            for scraped, page, failed in senators.scrape('01/01/2012', workers=options['workers'], parseWorkers=options['parse_workers']):
+                reports += len(scraped)
+                rows += len(page)
+            seconds = time.perf_counter() - began
+        finally:
+            # Point the scraper back at the real website
+            senators.useWebsite()
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(f"Scraped {reports} reports ({rows} rows) in {seconds:.1f}s")
+        self.stdout.write(f"{reports / seconds:.1f} reports/s, {rows / seconds:.1f} rows/s")
+        self.stdout.write(f"{server.requests} requests, {server.rateLimited} rate limited, rate limiter ended at {senators.limiter.rate:.2f} requests/s")
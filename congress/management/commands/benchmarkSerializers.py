@@ -0,0 +1,58 @@
+# Purpose: Create a custom command to compare the speed of the serializers and the fast serialization path using: "python manage.py benchmarkSerializers"
+
+# Imports
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+import time
+
+# Import the models, serializers and fast paths to benchmark
+from ...models import CongressTrade, CongressPerson
+from ...serializers import CongressTradeSerializer, CongressPersonSerializer, tradeValues, serializeTrades, personValues, serializePeople
+
+# Create custom command
+class Command(BaseCommand):
+    # Help message: "python manage.py benchmarkSerializers --help"
+    help = 'Compare the serializers of the congress-trades and congress-all endpoints with their values_list fast path, for pages of different sizes'
+
+    def add_arguments(self, parser):
+        # Number of rows per page
+        parser.add_argument('--sizes', nargs='+', type=int, default=[25, 100, 1000], help='Numbers of rows per page')
+        # Number of times every page is read and rendered
+        parser.add_argument('--repeat', type=int, default=20, help='Number of times every page is read and rendered')
+
+    # Read and render a page repeat times, returns the rendered JSON and the average number of milliseconds per page
+    def timePage(self, page, repeat):
+        began = time.perf_counter()
+        for i in range(repeat):
+            content = JSONRenderer().render(page())
+        return content, (time.perf_counter() - began) / repeat * 1000
+
+    def handle(self, *args, **options):
+        # The endpoints, with the page read through the serializer and through the fast path
+        endpoints = {
+            'congress-trades': (
+                lambda size: CongressTradeSerializer(CongressTrade.objects.select_related('name', 'ticker').order_by('-transactionDate', 'id')[:size], many=True).data,
+                lambda size: serializeTrades(tradeValues(CongressTrade.objects.order_by('-transactionDate', 'id'))[:size]),
+                CongressTrade.objects.count(),
+            ),
+            'congress-all': (
+                lambda size: CongressPersonSerializer(CongressPerson.objects.order_by('fullName')[:size], many=True).data,
+                lambda size: serializePeople(personValues(CongressPerson.objects.order_by('fullName'))[:size]),
+                CongressPerson.objects.count(),
+            ),
+        }
+
+        if all(rows == 0 for serializer, fastPath, rows in endpoints.values()):
+            raise CommandError("The database is empty, populate it first (python manage.py populateDB)")
+
+        for name, (serializer, fastPath, rows) in endpoints.items():
+            for size in options['sizes']:
+                # the table can have fewer rows than the page size
+                if size > rows:
+                    self.stdout.write(f"{name} {size} rows: skipped, there are only {rows} rows")
+                    continue
+
+                expected, serializerTime = self.timePage(lambda: serializer(size), options['repeat'])
+                content, fastPathTime = self.timePage(lambda: fastPath(size), options['repeat'])
+
+                self.stdout.write(f"{name} {size} rows: serializer {serializerTime:.2f}ms, fast path {fastPathTime:.2f}ms ({serializerTime / fastPathTime:.1f}x), {'identical' if content == expected else 'DIFFERENT'} JSON")
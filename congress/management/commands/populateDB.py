@@ -4,31 +4,84 @@
 # Imports
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
+import datetime
 import logging
 
 # Import scripts and models to populate the database
 from ...models import CongressPerson, CongressTrade, Ticker, SummaryStat
 from ...populate import historical as historicalPopulate
 from ...populate import current as currentPopulate
+from ...populate import backfill as backfillPopulate
+from ...scripts import senators
+from ...scripts.parsers import parsers
+from ...signals import deferStats
+from ...cache import bumpDataVersion
 
 # Create custom command
 class Command(BaseCommand):
     # Help message: "python manage.py populateDB --help"
     help = 'Run this command to initially populate the database. Type "python manage.py populateDB" to run'
 
+    # Options: "python manage.py populateDB --backfill 1/1/2012" or "python manage.py populateDB --resume"
+    def add_arguments(self, parser):
+        # Scrape the historical trades from the website instead of loading them from the transactions.json file
+        parser.add_argument('--backfill', metavar='MM/DD/YYYY', help='Scrape every report submitted since this date instead of loading transactions.json')
+        # Continue the last backfill that did not finish from its checkpoints
+        parser.add_argument('--resume', action='store_true', help='Continue the last unfinished backfill from where it stopped')
+        # Number of reports fetched at the same time during a backfill
+        parser.add_argument('--workers', type=int, default=1, help='Number of reports fetched concurrently during a backfill')
+        # Number of date ranges the backfill is split into, each date range is scraped at the same time with its own session
+        parser.add_argument('--shards', type=int, default=1, help='Number of date ranges scraped in parallel during a backfill')
+        # Number of processes that parse the reports during a backfill, so parsing does not slow down fetching
+        parser.add_argument('--parse-workers', type=int, default=0, help='Number of processes that parse reports during a backfill (0 parses on the fetch workers)')
+        # Parser used for the reports, "python manage.py benchmarkParsers" compares them
+        parser.add_argument('--parser', default=senators.parserBackend, choices=list(parsers), help='Parser used to parse the reports')
+        # Save the websites responses on disk, or replay a scrape entirely from the saved responses without using the network
+        parser.add_argument('--cache', metavar='DIRECTORY', help='Directory to cache the responses of the website in')
+        parser.add_argument('--replay', action='store_true', help='Only use responses from the cache, nothing is sent to the website')
+        # Number of transactions from the transactions file that are inserted in each database transaction
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Number of historical transactions inserted per database transaction')
+
     def handle(self, *args, **options):
+        # Saving tickers, congress people and summary stats updates their stats through signals (loaddata saves every ticker one at a time)
+        # Defer those updates and do them together once everything has been loaded
+        try:
+            with deferStats():
+                self.populate(**options)
+        finally:
+            # The data has changed, so the cached responses of the endpoints are no longer valid
+            # This also runs when populating fails part of the way, the pages that were committed before the failure have changed the data too
+            bumpDataVersion()
+
+    def populate(self, **options):
         # Log that we are now starting to populate the database
         logging.info("Populating database...")
         
         # Call the populate scripts
 
-        # Add Ticker Table (load it in from json file as it takes a lot of time to load it)
-        call_command('loaddata', 'ticker.json')
-        logging.info("Finished populating tickers table")
+        # Parse the scraped reports with the chosen parser
+        senators.parserBackend = options['parser']
+
+        # Cache (or replay) the responses of the website
+        senators.useCache(options['cache'], 'replay' if options['replay'] else 'record')
+
+        if options['resume']:
+            # Continue every unfinished shard of the last backfill from its checkpoint
+            backfillPopulate(resume=True, workers=options['workers'], parseWorkers=options['parse_workers'])
+            logging.info("Finished backfilling historical congress trades")
+        elif options['backfill']:
+            # Scrape the historical trades from the website, checkpointing after every page
+            startDate = datetime.datetime.strptime(options['backfill'], '%m/%d/%Y').date()
+            backfillPopulate(startDate, workers=options['workers'], shards=options['shards'], parseWorkers=options['parse_workers'])
+            logging.info("Finished backfilling historical congress trades")
+        else:
+            # Add Ticker Table (load it in from json file as it takes a lot of time to load it)
+            call_command('loaddata', 'ticker.json')
+            logging.info("Finished populating tickers table")
 
-        # Load the transactions into the database from the transactions.json file and add it to the database
-        historicalPopulate()
-        logging.info("Finished populating historical congress trades")
+            # Load the transactions into the database from the transactions.json file and add it to the database
+            historicalPopulate(chunkSize=options['chunk_size'])
+            logging.info("Finished populating historical congress trades")
  
         # Add the most recent transactions into the database
         currentPopulate()
@@ -43,10 +96,8 @@ class Command(BaseCommand):
             
             # Loop through the timeframes and update the summary stats
             for timeframe in timeframes:
-                # Create a SummaryStat object for each timeframe
-                obj = SummaryStat.objects.create(timeframe=timeframe)
-                # Update the summary stats for each timeframe using updatedStats()
-                obj.updateStats()
+                # Create a SummaryStat object for each timeframe, its stats are updated when the deferStats block in handle() ends
+                SummaryStat.objects.create(timeframe=timeframe)
             
         logging.info("Finished populating summary stats")
 
@@ -0,0 +1,37 @@
+# Purpose: Create a custom command to rebuild the rollups and stats from the transactions table using: "python manage.py rebuildRollups"
+
+# Imports
+from django.core.management.base import BaseCommand
+from django.db import transaction
+import logging
+
+# Import the models and the functions that rebuild them
+from ...models import SummaryStat, TickerRollup, CongressPersonRollup, rebuildDailyRollups, rebuildPeriodRollups, updateSectorStats
+from ...cache import bumpDataVersion
+
+# Create custom command
+class Command(BaseCommand):
+    # Help message: "python manage.py rebuildRollups --help"
+    help = 'Rebuild the daily, weekly and monthly rollups and the sector stats from the transactions table, run it after transactions were deleted or edited outside of the ingest scripts'
+
+    def handle(self, *args, **options):
+        # Rebuild everything in a single database transaction, so the endpoints never read partially rebuilt rollups
+        with transaction.atomic():
+            rebuildDailyRollups()
+            logging.info("Rebuilt daily rollups")
+
+            rebuildPeriodRollups(TickerRollup, 'ticker')
+            rebuildPeriodRollups(CongressPersonRollup, 'name')
+            logging.info("Rebuilt ticker and congress person rollups")
+
+            # The summary stats are read from the daily rollups
+            for summaryStat in SummaryStat.objects.all():
+                summaryStat.updateStats()
+
+            updateSectorStats()
+            logging.info("Rebuilt summary and sector stats")
+
+        # The data has changed, so the cached responses of the endpoints are no longer valid
+        bumpDataVersion()
+
+        self.stdout.write("Rollups rebuilt")
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0017_remove_congressperson_termsserved'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapedReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ptrLink', models.CharField(max_length=100, unique=True)),
+                ('notificationDate', models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScrapeState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('highWaterMark', models.DateField(blank=True, null=True)),
+                ('lastRun', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0018_scrapedreport_scrapestate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('startDate', models.DateField()),
+                ('offset', models.IntegerField(default=0)),
+                ('finished', models.BooleanField(default=False)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0019_scrapecheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapecheckpoint',
+            name='endDate',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:29
+
+from django.db import migrations, models
+import hashlib
+
+
+# Copy of models.tradeHash at the time of this migration, so the migration keeps working if tradeHash changes
+def tradeHash(name, ticker, disclosureDate, transactionDate, owner, assetDescription, assetType, transactionType, amount, comment, pdf, ptrLink):
+    values = [name, ticker, disclosureDate, transactionDate, owner, assetDescription, assetType, transactionType, amount, comment, bool(pdf), ptrLink]
+    content = '\x1f'.join('' if value is None else str(value) for value in values)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+# Compute the content hash of every existing trade, and delete duplicates the old unique_together let through (it ignored trades without a ticker)
+def backfillContentHash(apps, schema_editor):
+    CongressTrade = apps.get_model('congress', 'CongressTrade')
+
+    seen = set()
+    duplicates = []
+    batch = []
+
+    trades = CongressTrade.objects.select_related('name', 'ticker').order_by('id')
+    for trade in trades.iterator(chunk_size=2000):
+        trade.contentHash = tradeHash(
+            trade.name.fullName,
+            trade.ticker.ticker if trade.ticker_id else None,
+            trade.disclosureDate,
+            trade.transactionDate,
+            trade.owner,
+            trade.assetDescription,
+            trade.assetType,
+            trade.transactionType,
+            trade.amount,
+            trade.comment,
+            trade.pdf,
+            trade.ptrLink,
+        )
+
+        # keep the oldest copy of every trade
+        if trade.contentHash in seen:
+            duplicates.append(trade.id)
+            continue
+        seen.add(trade.contentHash)
+
+        batch.append(trade)
+        if len(batch) == 2000:
+            CongressTrade.objects.bulk_update(batch, ['contentHash'])
+            batch = []
+
+    CongressTrade.objects.bulk_update(batch, ['contentHash'])
+
+    for i in range(0, len(duplicates), 500):
+        CongressTrade.objects.filter(id__in=duplicates[i:i + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0020_scrapecheckpoint_enddate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='congresstrade',
+            name='contentHash',
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.RunPython(backfillContentHash, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='congresstrade',
+            unique_together=set(),
+        ),
+        migrations.AlterField(
+            model_name='congresstrade',
+            name='contentHash',
+            field=models.CharField(max_length=32, unique=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+
+# Copy of models.amountRanges at the time of this migration
+amountRanges = {
+    "$1,001 - $15,000": (1001, 15000),
+    "$15,001 - $50,000": (15001, 50000),
+    "$50,001 - $100,000": (50001, 100000),
+    "$100,001 - $250,000": (100001, 250000),
+    "$250,001 - $500,000": (250001, 500000),
+    "$500,001 - $1,000,000": (500001, 1000000),
+    "$1,000,001 - $5,000,000": (1000001, 5000000),
+    "$5,000,001 - $25,000,000": (5000001, 25000000),
+    "$25,000,001 - $50,000,000": (25000001, 50000000),
+    "Over $50,000,000": (50000000, 50000000),
+}
+
+
+# Fill in the amount bounds of every existing trade, with one update per amount range
+def backfillAmountBounds(apps, schema_editor):
+    CongressTrade = apps.get_model('congress', 'CongressTrade')
+
+    for amount, (amountMin, amountMax) in amountRanges.items():
+        CongressTrade.objects.filter(amount=amount).update(amountMin=amountMin, amountMax=amountMax)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0021_trade_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='congresstrade',
+            name='amountMax',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='congresstrade',
+            name='amountMin',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfillAmountBounds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:33
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+# Build the daily rollups of every existing trade (copy of models.rebuildDailyRollups at the time of this migration)
+def buildDailyRollups(apps, schema_editor):
+    CongressTrade = apps.get_model('congress', 'CongressTrade')
+    DailyTradeRollup = apps.get_model('congress', 'DailyTradeRollup')
+
+    totals = CongressTrade.objects.filter(transactionDate__isnull=False).order_by().values('transactionDate').annotate(
+        total=Count('id'),
+        purchases=Count('id', filter=Q(transactionType='Purchase')),
+        sales=Count('id', filter=Q(transactionType__startswith='Sale')),
+        sumMin=Sum('amountMin'),
+        sumMax=Sum('amountMax'),
+    )
+
+    DailyTradeRollup.objects.bulk_create(
+        [
+            DailyTradeRollup(
+                date=row['transactionDate'],
+                total=row['total'],
+                purchases=row['purchases'],
+                sales=row['sales'],
+                sumMin=row['sumMin'] or 0,
+                sumMax=row['sumMax'] or 0,
+            )
+            for row in totals
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0022_trade_amount_bounds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTradeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total', models.BigIntegerField(default=0)),
+                ('purchases', models.BigIntegerField(default=0)),
+                ('sales', models.BigIntegerField(default=0)),
+                ('sumMin', models.BigIntegerField(default=0)),
+                ('sumMax', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(buildDailyRollups, migrations.RunPython.noop),
+    ]
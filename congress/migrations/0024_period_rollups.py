@@ -0,0 +1,85 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+
+# Build the weekly and monthly rollups of every existing trade (copy of models.rebuildPeriodRollups at the time of this migration)
+def buildPeriodRollups(apps, schema_editor):
+    CongressTrade = apps.get_model('congress', 'CongressTrade')
+
+    for modelName, field in (('TickerRollup', 'ticker'), ('CongressPersonRollup', 'name')):
+        model = apps.get_model('congress', modelName)
+
+        for interval, trunc in (('week', TruncWeek), ('month', TruncMonth)):
+            totals = CongressTrade.objects.filter(**{f'{field}__isnull': False}, transactionDate__isnull=False).order_by().annotate(periodStart=trunc('transactionDate')).values(field, 'periodStart').annotate(
+                total=Count('id'),
+                purchases=Count('id', filter=Q(transactionType='Purchase')),
+                sales=Count('id', filter=Q(transactionType__startswith='Sale')),
+                sumMin=Sum('amountMin'),
+                sumMax=Sum('amountMax'),
+            )
+
+            model.objects.bulk_create(
+                [
+                    model(
+                        **{f'{field}_id': row[field]},
+                        interval=interval,
+                        periodStart=row['periodStart'],
+                        total=row['total'],
+                        purchases=row['purchases'],
+                        sales=row['sales'],
+                        sumMin=row['sumMin'] or 0,
+                        sumMax=row['sumMax'] or 0,
+                    )
+                    for row in totals
+                ],
+                batch_size=500,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0023_dailytraderollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TickerRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.BigIntegerField(default=0)),
+                ('purchases', models.BigIntegerField(default=0)),
+                ('sales', models.BigIntegerField(default=0)),
+                ('sumMin', models.BigIntegerField(default=0)),
+                ('sumMax', models.BigIntegerField(default=0)),
+                ('interval', models.CharField(max_length=10)),
+                ('periodStart', models.DateField()),
+                ('ticker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='congress.ticker')),
+            ],
+            options={
+                'unique_together': {('ticker', 'interval', 'periodStart')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CongressPersonRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.BigIntegerField(default=0)),
+                ('purchases', models.BigIntegerField(default=0)),
+                ('sales', models.BigIntegerField(default=0)),
+                ('sumMin', models.BigIntegerField(default=0)),
+                ('sumMax', models.BigIntegerField(default=0)),
+                ('interval', models.CharField(max_length=10)),
+                ('periodStart', models.DateField()),
+                ('name', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='congress.congressperson')),
+            ],
+            options={
+                'unique_together': {('name', 'interval', 'periodStart')},
+            },
+        ),
+        migrations.RunPython(buildPeriodRollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0024_period_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SectorStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.BigIntegerField(default=0)),
+                ('purchases', models.BigIntegerField(default=0)),
+                ('sales', models.BigIntegerField(default=0)),
+                ('sumMin', models.BigIntegerField(default=0)),
+                ('sumMax', models.BigIntegerField(default=0)),
+                ('kind', models.CharField(max_length=10)),
+                ('name', models.CharField(max_length=1000)),
+                ('timeframe', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('kind', 'name', 'timeframe')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.6 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0025_sectorstat'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='congresstrade',
+            index=models.Index(fields=['transactionDate', 'id'], name='trade_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='congresstrade',
+            index=models.Index(fields=['ticker', 'transactionDate', 'id'], name='trade_ticker_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='congresstrade',
+            index=models.Index(fields=['name', 'transactionDate', 'id'], name='trade_name_date_id_idx'),
+        ),
+    ]
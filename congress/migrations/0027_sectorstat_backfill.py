@@ -0,0 +1,57 @@
+# Generated by Django 3.2.6 on 2026-10-18 21:12
+
+import datetime
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+# Compute the stats of every sector and industry from the existing trades (copy of models.updateSectorStats at the time of this migration)
+def buildSectorStats(apps, schema_editor):
+    CongressTrade = apps.get_model('congress', 'CongressTrade')
+    SectorStat = apps.get_model('congress', 'SectorStat')
+
+    today = datetime.date.today()
+    stats = []
+
+    for kind in ('sector', 'industry'):
+        for timeframe in (0, 30, 60, 90, 120):
+            transactions = CongressTrade.objects.filter(**{f'ticker__{kind}__isnull': False}).exclude(**{f'ticker__{kind}': ''})
+            if timeframe > 0:
+                transactions = transactions.filter(transactionDate__lte=today, transactionDate__gt=today - datetime.timedelta(days=timeframe))
+
+            totals = transactions.order_by().values(f'ticker__{kind}').annotate(
+                total=Count('id'),
+                purchases=Count('id', filter=Q(transactionType='Purchase')),
+                sales=Count('id', filter=Q(transactionType__startswith='Sale')),
+                sumMin=Sum('amountMin'),
+                sumMax=Sum('amountMax'),
+            )
+
+            for row in totals:
+                stats.append(
+                    SectorStat(
+                        kind=kind,
+                        name=row[f'ticker__{kind}'],
+                        timeframe=timeframe,
+                        total=row['total'],
+                        purchases=row['purchases'],
+                        sales=row['sales'],
+                        sumMin=row['sumMin'] or 0,
+                        sumMax=row['sumMax'] or 0,
+                    )
+                )
+
+    SectorStat.objects.all().delete()
+    SectorStat.objects.bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('congress', '0026_trade_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(buildSectorStats, migrations.RunPython.noop),
+    ]
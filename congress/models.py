@@ -2,44 +2,43 @@
 # Purpose: Initilze the table models for all our endpoints
 
 # Imports 
+from django.db.models.functions import TruncWeek, TruncMonth
 from django.db.models import signals
-from django.db import models
+from django.db import models, transaction
 
-from .signals import summaryStatUpdate, tickerStatUpdate, congressPersonStatUpdate
+from .signals import summaryStatUpdate, tickerStatUpdate, congressPersonStatUpdate, tickerSectorUpdate, dataChanged
 
 from jsonfield import JSONField
 import datetime
+import hashlib
+
+# Hashmap of fixed price ranges matched their integer representations
+amountRanges = {
+    "$1,001 - $15,000": (1001, 15000),
+    "$15,001 - $50,000": (15001, 50000),
+    "$50,001 - $100,000": (50001, 100000),
+    "$100,001 - $250,000": (100001, 250000),
+    "$250,001 - $500,000": (250001, 500000),
+    "$500,001 - $1,000,000": (500001, 1000000),
+    "$1,000,001 - $5,000,000": (1000001, 5000000),
+    "$5,000,001 - $25,000,000": (5000001, 25000000),
+    "$25,000,001 - $50,000,000": (25000001, 50000000),
+    "Over $50,000,000": (50000000, 50000000),
+}
+
+# Get the lowest and highest value of an amount range string, (None, None) if it is not one of the fixed ranges
+def amountBounds(amount):
+    return amountRanges.get(str(amount), (None, None))
 
 # Calculate the average colume of trades
 # The transactions parameter accepts a queryset object of congress trade transactions 
 def getSumMid(transactions):
-    # Initialize the min and max sum values. These will keep track of our highest and lowest volumes possible. With this we can get the average volume.
-    sumMin = 0
-    sumMax = 0
-
-    # Count the number of transactions
-    total = transactions.count()
-
-    # Hashmap of fixed price ranges matched their integer representations
-    listOfAmounts = {
-        "$1,001 - $15,000": (1001, 15000),
-        "$15,001 - $50,000": (15001, 50000),
-        "$50,001 - $100,000": (50001, 100000),
-        "$100,001 - $250,000": (100001, 250000),
-        "$250,001 - $500,000": (250001, 500000),
-        "$500,001 - $1,000,000": (500001, 1000000),
-        "$1,000,001 - $5,000,000": (1000001, 5000000),
-        "$5,000,001 - $25,000,000": (5000001, 25000000),
-        "$25,000,001 - $50,000,000": (25000001, 50000000),
-        "Over $50,000,000": (50000000, 50000000),
-    }
+    # Sum the lowest and highest values of every transaction in the database with a single query. With this we can get the average volume.
+    sums = transactions.aggregate(sumMin=models.Sum('amountMin'), sumMax=models.Sum('amountMax'))
 
-    # iterate through the amount of each transaction 
-    # O(N) iteration on this loop through use of hashmap (Improved from previous O(N^2) iteration which used a nested for loop and array to search for the values)
-    for i in range(total):
-        # get the amount of the transaction using hashmap, and add the min value to sumMin and the max value to sumMax
-        sumMin += listOfAmounts[str(transactions[i].amount)][0]
-        sumMax += listOfAmounts[str(transactions[i].amount)][1]
+    # There are no sums when there are no transactions
+    sumMin = sums['sumMin'] or 0
+    sumMax = sums['sumMax'] or 0
     
     # Calculate the average traded volume using the max and min amount traded
     sumMid = (sumMax + sumMin) / 2
@@ -47,6 +46,18 @@ def getSumMid(transactions):
     # Return the average traded volume as a float
     return sumMid
 
+# Compact hash of the content of a congress trade, two trades with the same content always get the same hash
+# This is what duplicate trades are detected with, instead of a unique constraint over all of the trades columns
+# The name and ticker are the congress persons full name and the stock ticker (not their ids), and the dates can be date objects or "YYYY-MM-DD" strings
+def tradeHash(name, ticker, disclosureDate, transactionDate, owner, assetDescription, assetType, transactionType, amount, comment, pdf, ptrLink):
+    values = [name, ticker, disclosureDate, transactionDate, owner, assetDescription, assetType, transactionType, amount, comment, bool(pdf), ptrLink]
+
+    # Join the values with a separator that does not appear in the data, None is hashed the same as an empty value
+    content = '\x1f'.join('' if value is None else str(value) for value in values)
+
+    # 128 bit hash as 32 hexadecimal characters
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
 # Names of Congress
 class CongressPerson(models.Model):
     # A CharField is a character field
@@ -106,6 +117,8 @@ class CongressPerson(models.Model):
 # Signals to update total transactions for each congress member when there has beed a save(post_save) or deletion(post_delete)
 signals.post_save.connect(congressPersonStatUpdate, sender=CongressPerson)
 signals.post_delete.connect(congressPersonStatUpdate, sender=CongressPerson)
+signals.post_save.connect(dataChanged, sender=CongressPerson)
+signals.post_delete.connect(dataChanged, sender=CongressPerson)
 
 # Tickers Tables
 class Ticker(models.Model):
@@ -158,11 +171,28 @@ class Ticker(models.Model):
             totalVolumeTransactions=getSumMid(transactions), 
         )
 
-    
+    # Remember the sector and industry the ticker was loaded with, so a save can tell if they were edited (see sectorsChanged)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loadedSectors = instance.currentSectors()
+        return instance
+
+    # Sector and industry of the ticker, without loading them if they were deferred
+    def currentSectors(self):
+        return (self.__dict__.get('sector'), self.__dict__.get('industry'))
+
+    # Check if the sector or industry was edited since the ticker was loaded (tickers that were just created have no trades yet)
+    def sectorsChanged(self):
+        loaded = getattr(self, 'loadedSectors', None)
+        return loaded is not None and loaded != self.currentSectors()
 
 # Signals to update total transactions for each congress member
 signals.post_save.connect(tickerStatUpdate, sender=Ticker)
 signals.post_delete.connect(tickerStatUpdate, sender=Ticker)
+signals.post_save.connect(tickerSectorUpdate, sender=Ticker)
+signals.post_save.connect(dataChanged, sender=Ticker)
+signals.post_delete.connect(dataChanged, sender=Ticker)
     
 # Combination of Senator and House Data
 class CongressTrade(models.Model):
@@ -185,6 +215,10 @@ class CongressTrade(models.Model):
     
     # amount spent (this is a range)
     amount = models.CharField(max_length=60, blank=True)
+
+    # lowest and highest value of the amount range, so the volume of trades can be summed by the database
+    amountMin = models.IntegerField(blank=True, null=True)
+    amountMax = models.IntegerField(blank=True, null=True)
     
     # owner of transaction (spouce, child, etc)
     owner = models.CharField(max_length=60)
@@ -207,17 +241,108 @@ class CongressTrade(models.Model):
     # is the transaction a pdf
     # A BooleanField is a field that can store a boolean value
     pdf = models.BooleanField()
+
+    # hash of the content of the trade (see tradeHash), the unique index on it keeps duplicate trades out of the database
+    contentHash = models.CharField(max_length=32, unique=True)
     
     # String representation of object
     # Example without function below: <QuerySet [<Blog:>,<Blog:>,<Blog:>....]
     # Example with function below:  <QuerySet [<Blog:itsName>,<Blog:itsName>,<Blog:itsName>....]
     def __str__(self):
         return self.name.fullName
+
+    # Hash of the content of this trade
+    def computeHash(self):
+        return tradeHash(
+            self.name.fullName, 
+            self.ticker.ticker if self.ticker_id else None, 
+            self.disclosureDate, 
+            self.transactionDate, 
+            self.owner, 
+            self.assetDescription, 
+            self.assetType, 
+            self.transactionType, 
+            self.amount, 
+            self.comment, 
+            self.pdf, 
+            self.ptrLink
+        )
+
+    # Fill in the content hash and amount bounds of trades that are saved one at a time (for example from the admin page), the ingest scripts compute them themselves before bulk inserting
+    def save(self, *args, **kwargs):
+        if not self.contentHash:
+            self.contentHash = self.computeHash()
+        if self.amountMin is None and self.amountMax is None:
+            self.amountMin, self.amountMax = amountBounds(self.amount)
+        super().save(*args, **kwargs)
     
-    # Class we can use in django to create a unique_together constraint (can only create fields if they have a different value that an existing one combined with the fields listed), and ordering (orders the trades done by congress by the transaction date)
+    # Class we can use in django to order the trades done by congress by the transaction date
+    # The indexes are the keys the lists of trades are paginated by (see pagination.KeysetPagination), for every trade, and for the trades of a ticker or congress person
     class Meta:
-        unique_together = ('disclosureDate', 'transactionDate', 'owner', 'ticker', 'assetDescription', 'assetType', 'transactionType', 'amount', 'comment', 'name', 'pdf', 'ptrLink')
         ordering = ["-transactionDate"]
+        indexes = [
+            models.Index(fields=['transactionDate', 'id'], name='trade_date_id_idx'),
+            models.Index(fields=['ticker', 'transactionDate', 'id'], name='trade_ticker_date_id_idx'),
+            models.Index(fields=['name', 'transactionDate', 'id'], name='trade_name_date_id_idx'),
+        ]
+
+# Signals to invalidate the cached responses of the endpoints when a trade is edited or deleted outside of the ingest scripts (for example in the admin)
+signals.post_save.connect(dataChanged, sender=CongressTrade)
+signals.post_delete.connect(dataChanged, sender=CongressTrade)
+
+# Split a list of values into chunks, so IN queries stay under SQLite's limit on the number of query parameters
+def inChunks(values, size=500):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+# Aggregates of the totals of a group of transactions, used by every stats and rollup query so they all count the same way
+# Pass them to annotate() (one row of totals per group) or aggregate()
+def tradeTotalsAnnotation():
+    return {
+        'total': models.Count('id'),
+        'purchases': models.Count('id', filter=models.Q(transactionType='Purchase')),
+        # Here we use "startswith" because we have two options: "Sale (Full)" and "Sale (Partial)". Both of those options start with "Sale"
+        'sales': models.Count('id', filter=models.Q(transactionType__startswith='Sale')),
+        'sumMin': models.Sum('amountMin'),
+        'sumMax': models.Sum('amountMax'),
+    }
+
+# RECOMPUTE THE STATS OF MANY TICKERS OR CONGRESS PEOPLE AT ONCE
+'''
+Computes the same stats as the updateStats methods, but for every object at once
+## model is Ticker or CongressPerson, field is the name of the foreign key of CongressTrade that points to it ('ticker' or 'name')
+## ids limits the recompute to those objects, every object is recomputed when it is None
+The stats come from a single GROUP BY query with conditional counts (per 500 ids), and are written back with bulk_update, so the whole refresh takes a handful of queries
+Objects without any trades have their stats set to 0
+'''
+def bulkUpdateStats(model, field, ids=None, batchSize=500):
+    # Recompute every object in one pass, or the given ids 500 at a time (to stay under SQLite's limit on the number of query parameters)
+    groups = [None] if ids is None else inChunks(ids)
+
+    for group in groups:
+        trades = CongressTrade.objects.all()
+        objs = model.objects.only('pk')
+        if group is not None:
+            trades = trades.filter(**{f'{field}__in': group})
+            objs = objs.filter(pk__in=group)
+
+        # Totals of every object in a single query, order_by() drops the default ordering so it is not added to the GROUP BY
+        totals = trades.order_by().values(field).annotate(**tradeTotalsAnnotation())
+        totals = {row[field]: row for row in totals}
+
+        # Set the stats of every object, objects without trades are not in the totals
+        objs = list(objs)
+        for obj in objs:
+            row = totals.get(obj.pk, {})
+            obj.totalTransactions = row.get('total', 0)
+            obj.purchases = row.get('purchases', 0)
+            obj.sales = row.get('sales', 0)
+            # average traded volume using the max and min amount traded (see getSumMid)
+            obj.totalVolumeTransactions = int(((row.get('sumMin') or 0) + (row.get('sumMax') or 0)) / 2)
+
+        # Write the stats back in batches, bulk_update does not send the post_save signals
+        model.objects.bulk_update(objs, ['totalTransactions', 'purchases', 'sales', 'totalVolumeTransactions'], batch_size=batchSize)
 
 
 # Summary of all transactions 
@@ -240,22 +365,391 @@ class SummaryStat(models.Model):
 
     # Update congress persons transaction count every time the object is saved 
     def updateStats(self):
-        # Query database for all transactions for this congress person
-        transactions = CongressTrade.objects.filter(transactionDate__lte=datetime.datetime.today(), transactionDate__gt=datetime.datetime.today()-datetime.timedelta(days=self.timeframe))
+        # Sum the daily rollups of the transactions in the timeframe (up to and including today) 
+        today = datetime.date.today()
+        totals = rollupTotals(today - datetime.timedelta(days=self.timeframe - 1), today)
 
         # update model
-        SummaryStat.objects.filter(id=self.id).update(
-            # Count number of transactions
-            total=transactions.count(), 
-            # Count number of transactions
-            purchases=transactions.filter(transactionType='Purchase').count(), 
-            # Calculate the number of Sales
-            # Here we use "startswith" because we have two options: "Sale (Full)" and "Sale (Partial)". Both of those options start with "Sale"
-            sales=transactions.filter(transactionType__startswith='Sale').count(),
-            # Calculate the total volume of transactions
-            totalVolume=getSumMid(transactions), 
-        )
+        SummaryStat.objects.filter(id=self.id).update(**totals)
 
 # Signals to update total transactions for each congress member
 signals.post_save.connect(summaryStatUpdate, sender=SummaryStat)
 signals.post_delete.connect(summaryStatUpdate, sender=SummaryStat)
+signals.post_save.connect(dataChanged, sender=SummaryStat)
+signals.post_delete.connect(dataChanged, sender=SummaryStat)
+
+# TOTALS OF A GROUP OF TRANSACTIONS
+'''
+Base of the rollup tables, which keep the totals of a group of transactions (the transactions of a day, or the transactions of a ticker in a week, ...)
+The totals of newly inserted transactions are added to the rollups at ingest, so stats over time can be read from a few hundred rollup rows instead of every transaction
+The rollups are only kept up to date by the ingest scripts (populate.py), transactions that are deleted or edited any other way (for example in the admin) are still counted
+## Run "python manage.py rebuildRollups" afterwards to rebuild every rollup from the transactions table
+'''
+class TradeTotals(models.Model):
+    # number of transactions, purchases and sales
+    total = models.BigIntegerField(default=0)
+    purchases = models.BigIntegerField(default=0)
+    sales = models.BigIntegerField(default=0)
+
+    # sums of the lowest and highest values of the amount ranges of the transactions (the volume is the average of the two, see getSumMid)
+    sumMin = models.BigIntegerField(default=0)
+    sumMax = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    # average traded volume using the max and min amount traded
+    @property
+    def totalVolume(self):
+        return int((self.sumMin + self.sumMax) / 2)
+
+    # Add a single transaction to the totals
+    def addTrade(self, trade):
+        self.total += 1
+        # Here we use "startswith" because we have two options: "Sale (Full)" and "Sale (Partial)". Both of those options start with "Sale"
+        self.purchases += trade.transactionType == 'Purchase'
+        self.sales += trade.transactionType.startswith('Sale')
+        self.sumMin += trade.amountMin or 0
+        self.sumMax += trade.amountMax or 0
+
+    # Add the totals of another group of transactions to the totals
+    def addTotals(self, other):
+        self.total += other.total
+        self.purchases += other.purchases
+        self.sales += other.sales
+        self.sumMin += other.sumMin
+        self.sumMax += other.sumMax
+
+# Transaction date of a CongressTrade object as a date, the ingest scripts set it to a "YYYY-MM-DD" string
+def tradeDate(trade):
+    date = trade.transactionDate
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+    return date
+
+# Totals of the transactions made on a single day, so the summary stats of any date range can be calculated from a few hundred rows instead of every transaction
+class DailyTradeRollup(TradeTotals):
+    # transaction date
+    date = models.DateField(unique=True)
+
+    # String representation of object
+    def __str__(self):
+        return str(self.date)
+
+# Add newly inserted transactions to the daily rollups
+# Parameter: trades (list of CongressTrade objects that were just inserted, their transaction dates can be date objects or "YYYY-MM-DD" strings)
+# The totals of the new transactions are added to the rollups of their days, so the cost depends on the number of new transactions and not on the size of the table
+def addToDailyRollups(trades):
+    # Totals of the new transactions by day
+    deltas = {}
+    for trade in trades:
+        date = tradeDate(trade)
+        # transactions without a date are not part of any timeframe
+        if date is None:
+            continue
+
+        deltas.setdefault(date, DailyTradeRollup(date=date)).addTrade(trade)
+
+    # Add the totals to the days that already have a rollup (500 days at a time to stay under SQLite's limit on the number of query parameters)
+    existing = []
+    for chunk in inChunks(deltas):
+        existing.extend(DailyTradeRollup.objects.filter(date__in=chunk))
+
+    for rollup in existing:
+        rollup.addTotals(deltas.pop(rollup.date))
+
+    DailyTradeRollup.objects.bulk_update(existing, ['total', 'purchases', 'sales', 'sumMin', 'sumMax'], batch_size=500)
+
+    # The remaining days do not have a rollup yet
+    DailyTradeRollup.objects.bulk_create(deltas.values(), batch_size=500)
+
+# Rebuild every daily rollup from the transactions table with a single GROUP BY query, for when the rollups are out of date (for example after transactions were deleted)
+def rebuildDailyRollups():
+    # order_by() drops the default ordering so it is not added to the GROUP BY
+    totals = CongressTrade.objects.filter(transactionDate__isnull=False).order_by().values('transactionDate').annotate(**tradeTotalsAnnotation())
+
+    DailyTradeRollup.objects.all().delete()
+    DailyTradeRollup.objects.bulk_create(
+        [
+            DailyTradeRollup(
+                date=row['transactionDate'], 
+                total=row['total'], 
+                purchases=row['purchases'], 
+                sales=row['sales'], 
+                sumMin=row['sumMin'] or 0, 
+                sumMax=row['sumMax'] or 0
+            ) 
+            for row in totals
+        ], 
+        batch_size=500
+    )
+
+# First day of the week (monday) and of the month of a date
+def weekStart(date):
+    return date - datetime.timedelta(days=date.weekday())
+
+def monthStart(date):
+    return date.replace(day=1)
+
+# Intervals of the ticker and congress person time series, and the function that gives the first day of the period a date is in
+rollupIntervals = {
+    'week': weekStart,
+    'month': monthStart,
+}
+
+# Totals of the transactions of a stock ticker in a week or a month, for the time series of the ticker
+class TickerRollup(TradeTotals):
+    # stock ticker
+    ticker = models.ForeignKey(Ticker, on_delete=models.CASCADE)
+
+    # "week" or "month" (see rollupIntervals)
+    interval = models.CharField(max_length=10)
+
+    # first day of the week or month
+    periodStart = models.DateField()
+
+    # String representation of object
+    def __str__(self):
+        return f"{self.ticker_id} {self.interval} {self.periodStart}"
+
+    # A ticker has a single rollup per period, the index is also used to read the time series of a ticker in order
+    class Meta:
+        unique_together = ('ticker', 'interval', 'periodStart',)
+
+# Totals of the transactions of a congress person in a week or a month, for the time series of the congress person
+class CongressPersonRollup(TradeTotals):
+    # congress person
+    name = models.ForeignKey(CongressPerson, on_delete=models.CASCADE)
+
+    # "week" or "month" (see rollupIntervals)
+    interval = models.CharField(max_length=10)
+
+    # first day of the week or month
+    periodStart = models.DateField()
+
+    # String representation of object
+    def __str__(self):
+        return f"{self.name_id} {self.interval} {self.periodStart}"
+
+    # A congress person has a single rollup per period, the index is also used to read the time series of a congress person in order
+    class Meta:
+        unique_together = ('name', 'interval', 'periodStart',)
+
+# Add newly inserted transactions to the weekly and monthly rollups of their tickers or congress people
+# Parameters: model (TickerRollup or CongressPersonRollup), field (the foreign key of the rollup and of CongressTrade, "ticker" or "name"), trades (list of CongressTrade objects that were just inserted)
+def addToPeriodRollups(model, field, trades):
+    # Totals of the new transactions by (ticker or congress person id, interval, first day of the period)
+    deltas = {}
+    for trade in trades:
+        key = getattr(trade, f'{field}_id')
+        date = tradeDate(trade)
+        # transactions without a ticker (or without a date) are not part of any time series
+        if key is None or date is None:
+            continue
+
+        for interval, periodStart in rollupIntervals.items():
+            delta = deltas.get((key, interval, periodStart(date)))
+            if delta is None:
+                delta = deltas[(key, interval, periodStart(date))] = model(**{f'{field}_id': key}, interval=interval, periodStart=periodStart(date))
+            delta.addTrade(trade)
+
+    if not deltas:
+        return
+
+    # Load the rollups of the periods the new transactions are in, 500 tickers or congress people at a time (to stay under SQLite's limit on the number of query parameters)
+    ids = {key for key, interval, periodStart in deltas}
+    firstPeriod = min(periodStart for key, interval, periodStart in deltas)
+    lastPeriod = max(periodStart for key, interval, periodStart in deltas)
+
+    existing = []
+    for chunk in inChunks(ids):
+        rollups = model.objects.filter(**{f'{field}_id__in': chunk}, periodStart__gte=firstPeriod, periodStart__lte=lastPeriod)
+        for rollup in rollups:
+            # add the totals to the rollups that already exist
+            delta = deltas.pop((getattr(rollup, f'{field}_id'), rollup.interval, rollup.periodStart), None)
+            if delta is not None:
+                rollup.addTotals(delta)
+                existing.append(rollup)
+
+    model.objects.bulk_update(existing, ['total', 'purchases', 'sales', 'sumMin', 'sumMax'], batch_size=500)
+
+    # The remaining periods do not have a rollup yet
+    model.objects.bulk_create(deltas.values(), batch_size=500)
+
+# Rebuild every weekly and monthly rollup of the tickers or congress people from the transactions table, with a GROUP BY query per interval
+# Parameters: model (TickerRollup or CongressPersonRollup), field ("ticker" or "name")
+def rebuildPeriodRollups(model, field):
+    model.objects.all().delete()
+
+    for interval, trunc in (('week', TruncWeek), ('month', TruncMonth)):
+        # order_by() drops the default ordering so it is not added to the GROUP BY
+        totals = CongressTrade.objects.filter(**{f'{field}__isnull': False}, transactionDate__isnull=False).order_by().annotate(periodStart=trunc('transactionDate')).values(field, 'periodStart').annotate(**tradeTotalsAnnotation())
+
+        model.objects.bulk_create(
+            [
+                model(
+                    **{f'{field}_id': row[field]}, 
+                    interval=interval, 
+                    periodStart=row['periodStart'], 
+                    total=row['total'], 
+                    purchases=row['purchases'], 
+                    sales=row['sales'], 
+                    sumMin=row['sumMin'] or 0, 
+                    sumMax=row['sumMax'] or 0
+                ) 
+                for row in totals
+            ], 
+            batch_size=500
+        )
+
+# Summary stats of the transactions made from startDate to endDate (both included)
+# Returns a dictionary with the same fields as SummaryStat: total, purchases, sales and totalVolume
+def rollupTotals(startDate, endDate):
+    sums = DailyTradeRollup.objects.filter(date__gte=startDate, date__lte=endDate).aggregate(
+        total=models.Sum('total'),
+        purchases=models.Sum('purchases'),
+        sales=models.Sum('sales'),
+        sumMin=models.Sum('sumMin'),
+        sumMax=models.Sum('sumMax'),
+    )
+
+    return {
+        'total': sums['total'] or 0,
+        'purchases': sums['purchases'] or 0,
+        'sales': sums['sales'] or 0,
+        # average traded volume using the max and min amount traded (see getSumMid)
+        'totalVolume': ((sums['sumMin'] or 0) + (sums['sumMax'] or 0)) / 2,
+    }
+
+# Timeframes (in days) of the sector and industry stats, 0 is every transaction
+sectorTimeframes = [0, 30, 60, 90, 120]
+
+# Totals of the transactions of every sector and industry, recomputed after every ingest so the sector-stats endpoint only has to look up a row
+class SectorStat(TradeTotals):
+    # "sector" or "industry"
+    kind = models.CharField(max_length=10)
+
+    # name of the sector or industry (see Ticker.sector and Ticker.industry)
+    name = models.CharField(max_length=1000)
+
+    # number of days of transactions up to and including today, 0 for every transaction (see sectorTimeframes)
+    timeframe = models.IntegerField(default=0)
+
+    # String representation of object
+    def __str__(self):
+        return f"{self.kind} {self.name} ({self.timeframe})"
+
+    # A sector or industry has a single row per timeframe, the index is what the endpoint looks the stats up with
+    class Meta:
+        unique_together = ('kind', 'name', 'timeframe',)
+
+# Recompute the stats of every sector and industry
+# Runs a GROUP BY query over the transactions joined with their tickers for every kind and timeframe, and replaces the rows in a single database transaction
+# tickerIds is an optional list of the tickers that had new trades, then only the all-time stats of their sectors and industries are recomputed
+## Editing the sector or industry of a ticker moves its trades to another sector, so that recomputes every sector and industry (see signals.tickerSectorUpdate)
+## The stats of the other timeframes are always recomputed as their window moves with the date, but they only read the transactions of the last 120 days (using the transactionDate index)
+def updateSectorStats(tickerIds=None):
+    today = datetime.date.today()
+    stats = []
+
+    # Sectors and industries of the tickers that had new trades, None to recompute every sector and industry
+    changed = None
+    if tickerIds is not None:
+        changed = {'sector': set(), 'industry': set()}
+        for chunk in inChunks(tickerIds):
+            for sector, industry in Ticker.objects.filter(pk__in=chunk).values_list('sector', 'industry'):
+                changed['sector'].add(sector)
+                changed['industry'].add(industry)
+
+        # tickers without a sector (or industry) do not have stats
+        for names in changed.values():
+            names -= {None, ''}
+
+    for kind in ('sector', 'industry'):
+        for timeframe in sectorTimeframes:
+            # transactions of tickers that have a sector (or industry)
+            transactions = CongressTrade.objects.filter(**{f'ticker__{kind}__isnull': False}).exclude(**{f'ticker__{kind}': ''})
+            if timeframe > 0:
+                transactions = transactions.filter(transactionDate__lte=today, transactionDate__gt=today - datetime.timedelta(days=timeframe))
+            elif changed is not None:
+                # the all-time stats of the other sectors (or industries) have not changed
+                if not changed[kind]:
+                    continue
+                transactions = transactions.filter(**{f'ticker__{kind}__in': changed[kind]})
+
+            # order_by() drops the default ordering so it is not added to the GROUP BY
+            totals = transactions.order_by().values(f'ticker__{kind}').annotate(**tradeTotalsAnnotation())
+
+            for row in totals:
+                stats.append(
+                    SectorStat(
+                        kind=kind, 
+                        name=row[f'ticker__{kind}'], 
+                        timeframe=timeframe, 
+                        total=row['total'], 
+                        purchases=row['purchases'], 
+                        sales=row['sales'], 
+                        sumMin=row['sumMin'] or 0, 
+                        sumMax=row['sumMax'] or 0
+                    )
+                )
+
+    # Replace the old stats, readers never see a partially updated table
+    with transaction.atomic():
+        if changed is None:
+            SectorStat.objects.all().delete()
+        else:
+            SectorStat.objects.filter(timeframe__gt=0).delete()
+            for kind, names in changed.items():
+                for chunk in inChunks(names):
+                    SectorStat.objects.filter(kind=kind, timeframe=0, name__in=chunk).delete()
+
+        SectorStat.objects.bulk_create(stats, batch_size=500)
+
+# State the scraper keeps between runs, so the daily update only has to fetch reports that are new since the last successful run
+class ScrapeState(models.Model):
+    # name of the scraper (for example "senate")
+    name = models.CharField(max_length=100, unique=True)
+
+    # high-water mark: the latest notification date of all the reports ingested by the last successful run
+    highWaterMark = models.DateField(blank=True, null=True)
+
+    # when the last successful run finished
+    lastRun = models.DateTimeField(blank=True, null=True)
+
+    # String representation of object
+    def __str__(self):
+        return self.name
+
+# Index of every periodic transaction report that has already been ingested, so it is never downloaded and parsed again
+class ScrapedReport(models.Model):
+    # link to the report (the same link that is saved in CongressTrade.ptrLink)
+    ptrLink = models.CharField(max_length=100, unique=True)
+
+    # date the report was submitted
+    notificationDate = models.DateField(blank=True, null=True)
+
+    # String representation of object
+    def __str__(self):
+        return self.ptrLink
+
+# Checkpoint of a historical backfill (or of one of its shards), so a backfill that dies part way through can continue where it stopped
+class ScrapeCheckpoint(models.Model):
+    # first submission date of the reports that are being backfilled
+    startDate = models.DateField()
+
+    # last submission date of the reports that are being backfilled (a backfill can be split into several date ranges that each have their own checkpoint)
+    endDate = models.DateField(blank=True, null=True)
+
+    # offset of the next page of search results that still has to be scraped
+    offset = models.IntegerField(default=0)
+
+    # whether every page of the backfill has been scraped
+    finished = models.BooleanField(default=False)
+
+    # when the checkpoint was last saved
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    # String representation of object
+    def __str__(self):
+        return f"{self.startDate} - {self.endDate} ({self.offset})"
@@ -0,0 +1,95 @@
+# Purpose: Keyset (cursor) pagination for the lists of congress trades, so deep pages cost the same as the first page
+
+# Imports
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.db.models import F, Q
+from collections import OrderedDict
+import datetime
+import base64
+
+# Encode the position of a trade in the list as a cursor: its transaction date (empty when it has none) and id
+def encodeCursor(trade):
+    date = trade.transactionDate.isoformat() if trade.transactionDate else ''
+    return base64.urlsafe_b64encode(f"{date}|{trade.id}".encode('utf-8')).decode('ascii')
+
+# Decode a cursor into a (transaction date or None, id) tuple, raises ValueError if it is not a valid cursor
+def decodeCursor(cursor):
+    date, id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+    return (datetime.date.fromisoformat(date) if date else None, int(id))
+
+# KEYSET PAGINATION
+'''
+Opt-in cursor pagination over the key (transactionDate, id), newest trades first and trades without a transaction date last
+## Without the cursor parameter the pagination is the same limit/offset pagination every other endpoint uses
+## With the cursor parameter (empty for the first page) every page is read with "WHERE transactionDate <= cursor date AND (transactionDate < cursor date OR id < cursor id) ORDER BY transactionDate DESC, id DESC LIMIT limit + 1"
+   which starts walking the composite index at the cursor instead of scanning and discarding offset rows, and does not count the whole list
+The response has the link to the next page (null on the last page) and the results
+The order is fixed by the key, so the ordering parameter can not be combined with the cursor parameter (the response is a 400 Bad Request)
+'''
+class KeysetPagination(LimitOffsetPagination):
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Limit/offset pagination when the client did not ask for a cursor
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        # The cursor is a position in the order of the key, it has no meaning in any other order
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise ValidationError({self.cursor_query_param: f'The cursor can not be combined with the {api_settings.ORDERING_PARAM} parameter'})
+
+        self.request = request
+        self.limit = self.get_limit(request)
+
+        # Stable order over the key, trades without a transaction date come last no matter how the database sorts nulls
+        queryset = queryset.order_by(F('transactionDate').desc(nulls_last=True), '-id')
+
+        # Only the trades after the cursor
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            try:
+                date, id = decodeCursor(cursor)
+            except ValueError:
+                raise NotFound('Invalid cursor')
+        else:
+            date, id = None, None
+
+        # Read one extra trade to know if there is a next page
+        if cursor and date is None:
+            # the cursor is in the trades without a transaction date
+            page = list(queryset.filter(transactionDate__isnull=True, id__lt=id)[:self.limit + 1])
+        elif cursor:
+            # "transactionDate <= date" is a range of the index, the trades of the same date are then narrowed down by id
+            page = list(queryset.filter(transactionDate__lte=date).filter(Q(transactionDate__lt=date) | Q(id__lt=id))[:self.limit + 1])
+
+            # the trades without a transaction date come after every trade that has one
+            if len(page) <= self.limit:
+                page += list(queryset.filter(transactionDate__isnull=True)[:self.limit + 1 - len(page)])
+        else:
+            page = list(queryset[:self.limit + 1])
+
+        self.nextCursor = encodeCursor(page[self.limit - 1]) if len(page) > self.limit else None
+
+        return page[:self.limit]
+
+    # Link to the next page of the cursor pagination
+    def getNextCursorLink(self):
+        if self.nextCursor is None:
+            return None
+
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.nextCursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response(OrderedDict([
+            ('next', self.getNextCursorLink()),
+            ('results', data)
+        ]))
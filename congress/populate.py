@@ -2,205 +2,502 @@
 # Purpose: The purpose of this script is to populate the database with historical data, and then update the database with the current data.
 
 # Imports
-from django.db.models import Q
+from django.db.models import Q, Max
+from django.db import transaction
+from django.utils import timezone
 
-from .models import CongressPerson, Ticker, CongressTrade
-from .scripts.senators import main as getSenatorData
+from .models import CongressPerson, Ticker, CongressTrade, ScrapeState, ScrapedReport, ScrapeCheckpoint, tradeHash, amountBounds, bulkUpdateStats, addToDailyRollups
+from .models import TickerRollup, CongressPersonRollup, addToPeriodRollups, updateSectorStats, inChunks
+from .scripts.senators import scrape as scrapeSenatorData, pageLength
+from .scripts.pipeline import pipelineStats
+from .scripts.ndjson import readRecords
 from .scripts.ticker import getTickerData
 
+import itertools
+import threading
 import datetime
+import requests
 import logging
-import json
+import queue
 import time
+import os
 
-# Get or Create Ticker Object - Mohammed Al-Rasheed
-# Parameter: ticker (string)
-def getTicker(stockTicker):
-    try:
-        # If the ticker is equal to "--", or "-" then return None as it is not a stock ticker 
-        if stockTicker == "--" or stockTicker == "-":
-            # If the stock ticker is equal to "-" then get or create a Ticker object with the ticker name of "-"
-            tickerObj, created = Ticker.objects.get_or_create(ticker="-")
-            # return the object
-            return tickerObj
-
-        # Check to see if the stock ticker is already in the database, if not, create it
-        # tickerObj holds the object
-        # created is a boolean value which indicates if the object has been created or not
-        tickerObj, created = Ticker.objects.get_or_create(ticker=stockTicker)
-
-        # If the stock ticker has just beed created and also dont look for information for stock tickers that have periods or dashes in them
-        if created == True and '.' not in stockTicker and '-' not in stockTicker:
-            # Get more data about the stock ticker
-            sector, industry, company, marketcap, quoteType = getTickerData(stockTicker)
-            
-            # if the quoteType is not an ETF
-            if quoteType != "ETF":
-                # Assign the stock ticker information to the newly created ticker objects fields
-                tickerObj.sector = sector
+# Normalize a stock ticker
+# Parameter: stockTicker (string)
+def normalizeTicker(stockTicker):
+    # If the ticker is equal to "--", or "-" then it is not a stock ticker, all of those transactions share the Ticker object with the ticker name of "-"
+    if stockTicker == "--" or stockTicker == "-":
+        return "-"
 
-                tickerObj.industry = industry
+    return stockTicker
 
-                tickerObj.company = company
+# Normalize the name of a congress person
+# Parameter: name (string)
+def normalizeName(name):
+    # remove trailing whitespace
+    name = name.strip()
+    # replace commas
+    name = name.replace(",", "")
+    # remove periods
+    name = name.replace(".", "")
 
-                tickerObj.marketcap = marketcap
-            else:
-                # If the ticker is an ETF, then set the sector to ETF which would be quoteType
-                tickerObj.sector = quoteType
+    return name
 
-            # Save the changes to the database
-            tickerObj.save()
+# Create a new (unsaved) Ticker Object
+# Parameter: stockTicker (string)
+def newTicker(stockTicker):
+    tickerObj = Ticker(ticker=stockTicker)
 
-        # Return the ticker object
+    # dont look for information for stock tickers that have periods or dashes in them
+    if '.' in stockTicker or '-' in stockTicker:
         return tickerObj
 
-    except Exception as e:
-        # Error checking for possible errors as we gradually scale our database
-        logging.error("Error while creating a stock ticker object")
-        logging.error(e)
-
-
-# Get or Create Congress Person Object - Farhan Rehman
-# Parameter: name (string)
-def getCongressPerson(name):
     try:
-        # find congress person object in database table CongressPerson
-    
-        # remove trailing whitespace
-        name = name.strip()
-        # replace commas
-        name = name.replace(",", "")
-        # remove periods
-        name = name.replace(".", "")
-
-        # Check (get) to see if an object already exists with the same name, if not, create a Congress Person Object
-        congressPerson, created = CongressPerson.objects.get_or_create(fullName=name)
+        # Get more data about the stock ticker
+        sector, industry, company, marketcap, quoteType = getTickerData(stockTicker)
         
-        # return the congressPerson object
-        return congressPerson
+        # if the quoteType is not an ETF
+        if quoteType != "ETF":
+            # Assign the stock ticker information to the newly created ticker objects fields
+            tickerObj.sector = sector
+
+            tickerObj.industry = industry
+
+            tickerObj.company = company
+
+            tickerObj.marketcap = marketcap
+        else:
+            # If the ticker is an ETF, then set the sector to ETF which would be quoteType
+            tickerObj.sector = quoteType
 
     except Exception as e:
-        # Error checking for possible errors as we gradually scale our database
-        logging.error("Error while creating a congress person object")
+        # Error checking for possible errors as we gradually scale our database, the ticker is still created without the extra information
+        logging.error(f"Error while getting the data of the stock ticker {stockTicker}")
         logging.error(e)
 
-        # Do not add the transaction to the database if we dont know who it belongs to. Log the data and review the edge case later.
-        return None
+    return tickerObj
+
+# Get or Create the objects of many tickers at once
+# Parameter: stockTickers (set of normalized tickers)
+# Returns a dictionary of ticker to Ticker id
+def resolveTickers(stockTickers):
+    # Load the tickers that already exist with one query
+    tickerIds = {}
+    for chunk in inChunks(stockTickers):
+        tickerIds.update(Ticker.objects.filter(ticker__in=chunk).values_list('ticker', 'id'))
+
+    # Create all the tickers that do not exist yet
+    missing = [stockTicker for stockTicker in stockTickers if stockTicker not in tickerIds]
+    if missing:
+        Ticker.objects.bulk_create([newTicker(stockTicker) for stockTicker in missing], ignore_conflicts=True)
+
+        # Load the ids of the tickers we just created
+        for chunk in inChunks(missing):
+            tickerIds.update(Ticker.objects.filter(ticker__in=chunk).values_list('ticker', 'id'))
+
+    return tickerIds
+
+# Get or Create the objects of many congress people at once
+# Parameter: names (set of normalized names)
+# Returns a dictionary of full name to CongressPerson id
+def resolveCongressPeople(names):
+    # Load the congress people that already exist with one query
+    congressPersonIds = {}
+    for chunk in inChunks(names):
+        congressPersonIds.update(CongressPerson.objects.filter(fullName__in=chunk).values_list('fullName', 'id'))
+
+    # Create all the congress people that do not exist yet
+    missing = [name for name in names if name not in congressPersonIds]
+    if missing:
+        CongressPerson.objects.bulk_create([CongressPerson(fullName=name) for name in missing], ignore_conflicts=True)
+
+        # Load the ids of the congress people we just created
+        for chunk in inChunks(missing):
+            congressPersonIds.update(CongressPerson.objects.filter(fullName__in=chunk).values_list('fullName', 'id'))
+
+    return congressPersonIds
 
 # Update Database - Mohammed Al-Rasheed
 # Parameter: data (json)
+'''
+Parse every row, then resolve the tickers and congress people of all the rows together
+## Every distinct ticker and name is loaded with a single IN query, and the missing ones are created with a single bulk_create
+## The rows are then matched to their ticker and congress person ids from a dictionary
+Trades that are already in the database (same content hash) are left out before inserting
+Returns the set of ticker ids and the set of congress person ids of the trades that were inserted, so only their stats have to be updated
+'''
 def updateDB(data):
-    congressTradesObjs = []
+    rows = []
 
     for i, row in enumerate(data):
-        # Get all values in a variable
-        name = row['Name']
-
-        # convert dates into proper format
-        notificationDate = datetime.datetime.strptime(row['Notification Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
-        transactionDate = datetime.datetime.strptime(row['Transaction Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
-        
-        # Assign variables to json items
-        source = row['Link']
-        ticker = row['Ticker']
-        owner = row['Owner']
-        assetDescription = row['Asset Name']
-        assetType = row['Asset Type']
-        transactionType = row['Type']
-        amount = row['Amount']
-        comment = row['Comment']
-
-        # check if assetName contains a list
-        assetDetails = None
-
-        # If the assetDescription contains a list then we know that it contins extra details about the asset
-        # For example option or bonds information
-        if type(assetDescription) == list:
-            # Check for Rates/Matures, and Options details
-            if "Rates/Matures" in assetDescription[1][0].lower() or "put" in assetDescription[1][0].lower() or "call" in assetDescription[1][0].lower():
-                # If it containd options or bonds information, flatten the list and add it to the assetDetails field
-                assetDetails = " ".join(assetDescription[1])
+        try:
+            # convert dates into proper format
+            notificationDate = datetime.datetime.strptime(row['Notification Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
+            transactionDate = datetime.datetime.strptime(row['Transaction Date'], '%m/%d/%Y').strftime('%Y-%m-%d')
             
-            # if there is a list, the first element in the assetDescritions will contain the assetDescription 
-            assetDescription = assetDescription[0]
-
-        # get or create Ticker object
-        ticker = getTicker(ticker[0])
+            # Assign variables to json items
+            assetDescription = row['Asset Name']
 
-        # get or create the congressperson object
-        congressPerson = getCongressPerson(name)
+            # check if assetName contains a list
+            assetDetails = None
 
-        # Create Congress Trade Object and add it to objs
-        try:
-            congressTradesObjs.append(
-                CongressTrade(
-                    name=congressPerson,
-                    ticker=ticker, 
-                    transactionDate=transactionDate, 
-                    disclosureDate=notificationDate, 
-                    transactionType=transactionType, 
-                    amount=amount, 
-                    owner=owner, 
-                    assetDescription=assetDescription, 
-                    assetDetails=assetDetails,
-                    assetType=assetType, 
-                    comment=comment, 
-                    pdf=False, 
-                    ptrLink=source
-                )
-            )            
+            # If the assetDescription contains a list then we know that it contins extra details about the asset
+            # For example option or bonds information
+            if type(assetDescription) == list:
+                # Check for Rates/Matures, and Options details
+                if "Rates/Matures" in assetDescription[1][0].lower() or "put" in assetDescription[1][0].lower() or "call" in assetDescription[1][0].lower():
+                    # If it containd options or bonds information, flatten the list and add it to the assetDetails field
+                    assetDetails = " ".join(assetDescription[1])
                 
+                # if there is a list, the first element in the assetDescritions will contain the assetDescription 
+                assetDescription = assetDescription[0]
+
+            rows.append({
+                'name': normalizeName(row['Name']),
+                'ticker': normalizeTicker(row['Ticker'][0]),
+                'transactionDate': transactionDate, 
+                'disclosureDate': notificationDate, 
+                'transactionType': row['Type'], 
+                'amount': row['Amount'], 
+                'owner': row['Owner'], 
+                'assetDescription': assetDescription, 
+                'assetDetails': assetDetails,
+                'assetType': row['Asset Type'], 
+                'comment': row['Comment'], 
+                'ptrLink': row['Link'],
+            })
+
         except Exception as e:
             # Error checking for possible errors as we gradually scale our database
-
-            # There is an overlap in dates, so a UNIQUE constraint error will be thrown, but should be ignored
-            logging.error("Error while creating a congress trade object")
+            logging.error("Error while reading a congress trade")
             logging.error(e)
             continue
+
+    # get or create all the Ticker and CongressPerson objects
+    tickerIds = resolveTickers({row['ticker'] for row in rows})
+    congressPersonIds = resolveCongressPeople({row['name'] for row in rows})
+
+    # Create Congress Trade Objects
+    congressTradesObjs = []
+    for row in rows:
+        # Do not add the transaction to the database if we dont know who it belongs to. Log the data and review the edge case later.
+        if row['name'] not in congressPersonIds:
+            logging.error(f"Error while creating a congress trade object, there is no congress person {row['name']}")
+            continue
+
+        name = row.pop('name')
+        ticker = row.pop('ticker')
+
+        # lowest and highest value of the amount range
+        amountMin, amountMax = amountBounds(row['amount'])
+
+        congressTradesObjs.append(
+            CongressTrade(
+                name_id=congressPersonIds[name],
+                ticker_id=tickerIds.get(ticker),
+                pdf=False,
+                amountMin=amountMin,
+                amountMax=amountMax,
+                # hash of the trades content, used to detect duplicates
+                contentHash=tradeHash(
+                    name, 
+                    ticker if ticker in tickerIds else None, 
+                    row['disclosureDate'], 
+                    row['transactionDate'], 
+                    row['owner'], 
+                    row['assetDescription'], 
+                    row['assetType'], 
+                    row['transactionType'], 
+                    row['amount'], 
+                    row['comment'], 
+                    False, 
+                    row['ptrLink']
+                ),
+                **row
+            )
+        )
     
-    # Bulk create all the objects
-    CongressTrade.objects.bulk_create(congressTradesObjs, ignore_conflicts=True)
+    # There is an overlap in dates, so leave out the trades that are already in the database (and duplicates within this batch)
+    existing = set()
+    for chunk in inChunks({obj.contentHash for obj in congressTradesObjs}):
+        existing.update(CongressTrade.objects.filter(contentHash__in=chunk).values_list('contentHash', flat=True))
+
+    newTrades = []
+    for obj in congressTradesObjs:
+        if obj.contentHash not in existing:
+            existing.add(obj.contentHash)
+            newTrades.append(obj)
+
+    # Bulk create all the new objects
+    # A trade inserted by another writer in the meantime would still be thrown, but should be ignored
+    CongressTrade.objects.bulk_create(newTrades, batch_size=500, ignore_conflicts=True)
+
+    # Add the new trades to the totals of their days, and to the time series of their tickers and congress people
+    addToDailyRollups(newTrades)
+    addToPeriodRollups(TickerRollup, 'ticker', newTrades)
+    addToPeriodRollups(CongressPersonRollup, 'name', newTrades)
+
+    # Return the tickers and congress people whose stats changed
+    return {obj.ticker_id for obj in newTrades if obj.ticker_id is not None}, {obj.name_id for obj in newTrades}
 
 # update all the ticker objects - Farhan Rehman
-def updateTickerStats():
-    # Get all the tickers objects
-    tickerObjs = Ticker.objects.all()
-    # loop through all the tickers objects
-    for ticker in tickerObjs:   
-        # update each tickers stats
-        ticker.updateStats()
+# Parameter: ids (set of ticker ids returned by updateDB), every ticker is updated when it is None
+def updateTickerStats(ids=None):
+    # recompute the stats of the tickers with a single aggregate query
+    bulkUpdateStats(Ticker, 'ticker', ids)
 
 # update all the congressperson objects - Mohammed Al-Rasheed
-def updateCongressPersonStats():
-    # Get all the congressperson objects
-    congressPersonObjs = CongressPerson.objects.all()
-    # loop through all the congressperson objects
-    for congressPerson in congressPersonObjs:
-        # update each congressperson stats
-        congressPerson.updateStats()
+# Parameter: ids (set of congressperson ids returned by updateDB), every congressperson is updated when it is None
+def updateCongressPersonStats(ids=None):
+    # recompute the stats of the congresspeople with a single aggregate query
+    bulkUpdateStats(CongressPerson, 'name', ids)
 
 # Load historical data - Farhan Rehman
-def historical():
-    # Load historical data  
-    data = json.load(open("./congress/scripts/data/transactions.json"))
-    updateDB(data)
+# Parameters: path (string), the NDJSON file written by the senator script (files with a single json array are read as well), chunkSize (int)
+# The file is streamed and inserted chunkSize transactions at a time, each chunk in its own database transaction, so memory use is bounded by the chunk size
+def historical(path=None, chunkSize=1000):
+    # Use the NDJSON file, or the json file written before we switched to NDJSON if there is no NDJSON file
+    if path is None:
+        path = "./congress/scripts/data/transactions.ndjson"
+        if not os.path.exists(path):
+            path = "./congress/scripts/data/transactions.json"
+
+    # Stream the historical data from the file one transaction at a time
+    data = readRecords(path)
+
+    began = time.monotonic()
+    total = 0
+
+    while True:
+        # Take the next chunk of transactions from the file
+        chunk = list(itertools.islice(data, chunkSize))
+        if not chunk:
+            break
+
+        # Insert the chunk in a single database transaction
+        with transaction.atomic():
+            updateDB(chunk)
+
+        total += len(chunk)
+        logging.info(f"Loaded {total} historical transactions ({total / (time.monotonic() - began):.1f} rows/s)")
     
     # Update the CongressPerson and Ticker summary stats 
     updateTickerStats()
     updateCongressPersonStats()
+    updateSectorStats()
+
+# Add scraped reports to the index of ingested reports
+# Parameter: reports (list of (link, notification date) tuples as yielded by the senator script)
+def recordScrapedReports(reports):
+    ScrapedReport.objects.bulk_create(
+        [
+            ScrapedReport(
+                ptrLink=link, 
+                notificationDate=datetime.datetime.strptime(notificationDate, '%m/%d/%Y').date()
+            ) 
+            for link, notificationDate in reports
+        ], 
+        ignore_conflicts=True
+    )
 
 # Load current data using senator script - Farhan Rehman
+# Returns the set of ticker ids and the set of congress person ids that had new trades
 def current():
-    # get todays date and format to month/day/year as thats the only format the API accepts
-    today = datetime.datetime.today().strftime('%m-%d-%Y')
-    
-    # get data from API
-    # data = getSenatorData(today)
-    data = getSenatorData('1/1/2022')
+    # Get the state of the senate scraper from the last run
+    state, created = ScrapeState.objects.get_or_create(name='senate')
+
+    # Only fetch reports submitted on or after the high-water mark of the last successful run
+    # The first time we run, start from the latest disclosure we already have (or the start of 2022 if the database is empty)
+    startDate = state.highWaterMark or CongressTrade.objects.aggregate(latest=Max('disclosureDate'))['latest'] or datetime.date(2022, 1, 1)
+
+    # Reports after the start date can already be ingested when the last run stopped early for a report that failed
+    highWaterMark = ScrapedReport.objects.filter(notificationDate__gte=startDate).aggregate(latest=Max('notificationDate'))['latest'] or startDate
+
+    # Tickers and congress people that had new trades
+    tickerIds, congressPersonIds = set(), set()
+
+    # Reports submitted on the high-water mark date could have been ingested by the last run, skip those reports
+    seen = set(ScrapedReport.objects.filter(notificationDate__gte=startDate).values_list('ptrLink', flat=True))
+
+    # get data from API one page of reports at a time, with the date formatted to month/day/year as thats the only format the API accepts
+    pages = scrapeSenatorData(startDate.strftime('%m/%d/%Y'), seen=seen)
     
-    # call update database function
-    updateDB(data)
+    # Notification date of the earliest report that could not be scraped, None if every report was scraped
+    earliestFailed = None
 
-    # Update the CongressPerson and Ticker summary stats 
-    updateTickerStats()
-    updateCongressPersonStats()
+    # call update database function for every page as soon as it is scraped, so progress is saved even if the scrape fails later on
+    for reports, page, failed in pages:
+        # Save the transactions and mark their reports as ingested together
+        with transaction.atomic():
+            tickers, congressPeople = updateDB(page)
+            recordScrapedReports(reports)
+
+        tickerIds |= tickers
+        congressPersonIds |= congressPeople
+
+        # Keep track of the latest report we have ingested
+        for link, notificationDate in reports:
+            highWaterMark = max(highWaterMark, datetime.datetime.strptime(notificationDate, '%m/%d/%Y').date())
+
+        # Keep track of the earliest report we could not scrape
+        for link, notificationDate in failed:
+            notificationDate = datetime.datetime.strptime(notificationDate, '%m/%d/%Y').date()
+            earliestFailed = notificationDate if earliestFailed is None else min(earliestFailed, notificationDate)
+
+    # The scrape finished successfully, so the next run can start from the latest report we ingested
+    # If a report failed the next run starts from its date instead, so it is tried again (the reports we did ingest are in seen and are skipped)
+    if earliestFailed is not None:
+        logging.warning(f"Some reports could not be scraped, the next run starts again from {earliestFailed}")
+        highWaterMark = min(highWaterMark, earliestFailed)
+
+    state.highWaterMark = highWaterMark
+    state.lastRun = timezone.now()
+    state.save()
+
+    # Update the CongressPerson and Ticker summary stats, only the ones that had new trades have changed
+    updateTickerStats(tickerIds)
+    updateCongressPersonStats(congressPersonIds)
+
+    # Recompute the sector and industry stats (the timeframes move with the date, so they are recomputed even when there were no new trades)
+    updateSectorStats(tickerIds)
+
+    return tickerIds, congressPersonIds
+
+# Split the dates from startDate to endDate into a number of shards of (about) the same length
+# Returns a list of (start, end) date tuples, both dates are included in the shard
+def splitDateRange(startDate, endDate, shards):
+    # number of days in the whole range
+    days = (endDate - startDate).days + 1
+    # never create more shards than there are days
+    shards = max(1, min(shards, days))
+
+    ranges = []
+    for i in range(shards):
+        shardStart = startDate + datetime.timedelta(days=days * i // shards)
+        shardEnd = startDate + datetime.timedelta(days=days * (i + 1) // shards - 1)
+        ranges.append((shardStart, shardEnd))
+
+    return ranges
+
+# Scrape a single shard of a backfill
+# Runs in its own thread with its own session (and therefore its own validated CSRF token), and puts every scraped page on the queue for the database writer
+def scrapeShard(checkpoint, pageQueue, workers, seen, parseWorkers, stats):
+    try:
+        endDate = checkpoint.endDate.strftime('%m/%d/%Y') if checkpoint.endDate else None
+        pages = scrapeSenatorData(checkpoint.startDate.strftime('%m/%d/%Y'), workers=workers, seen=seen, start=checkpoint.offset, endDate=endDate, session=requests.Session(), parseWorkers=parseWorkers, stats=stats)
+
+        for reports, page, failed in pages:
+            pageQueue.put((checkpoint, reports, page, failed))
+
+        # None tells the writer that this shard has been fully scraped
+        pageQueue.put((checkpoint, None, None, None))
+    except Exception as e:
+        # The writer leaves the checkpoint unfinished, so the shard can be resumed later
+        pageQueue.put((checkpoint, e, None, None))
+
+# Log the throughput of every stage of the scraping pipeline
+def logStats(stats):
+    for stage in stats.values():
+        # stages that were not used (for example parse, when the reports are parsed by the fetch workers) are left out
+        if stage.reports > 0:
+            logging.info(str(stage))
+
+# Backfill historical data using senator script
+# Parameters: startDate (datetime.date), resume (bool), workers (int), shards (int), endDate (datetime.date), parseWorkers (int)
+# The dates from startDate to endDate (today by default) are split into shards that are scraped at the same time, each by its own thread
+# All the scraped pages go through a single database writer (this thread), which after every page saves its transactions, adds its reports to the index of ingested reports, and checkpoints the offset of the shards next page
+# With resume=True every unfinished shard continues from its checkpoint instead of starting a new backfill
+# With parseWorkers every shard parses its reports in a pool of processes, and the throughput of the fetch, parse, and write stages is logged as the backfill runs
+def backfill(startDate=None, resume=False, workers=1, shards=1, endDate=None, parseWorkers=0):
+    if resume:
+        # Get every shard that did not finish
+        checkpoints = list(ScrapeCheckpoint.objects.filter(finished=False))
+
+        if len(checkpoints) == 0:
+            logging.info("There is no unfinished backfill to resume")
+            return
+
+        for checkpoint in checkpoints:
+            logging.info(f"Resuming backfill from {checkpoint.startDate} to {checkpoint.endDate} at offset {checkpoint.offset}")
+    else:
+        # Start a new backfill from the first page of every shard
+        endDate = endDate or datetime.date.today()
+        checkpoints = [ScrapeCheckpoint.objects.create(startDate=shardStart, endDate=shardEnd) for shardStart, shardEnd in splitDateRange(startDate, endDate, shards)]
+
+    # Reports that have already been ingested (by this backfill before it stopped, or by any other run) are skipped
+    # This is read before the shards start and is never changed, so all the shards can share it
+    firstDate = min(checkpoint.startDate for checkpoint in checkpoints)
+    seen = set(ScrapedReport.objects.filter(notificationDate__gte=firstDate).values_list('ptrLink', flat=True))
+
+    # Bounded queue, so the shards can not get too far ahead of the database writer
+    pageQueue = queue.Queue(maxsize=len(checkpoints) * 2)
+
+    # Throughput of every stage, shared by all the shards
+    stats = pipelineStats()
+
+    # Start scraping every shard
+    threads = [threading.Thread(target=scrapeShard, args=(checkpoint, pageQueue, workers, seen, parseWorkers, stats), daemon=True) for checkpoint in checkpoints]
+    for thread in threads:
+        thread.start()
+
+    # Tickers and congress people that had new trades
+    tickerIds, congressPersonIds = set(), set()
+
+    # Shards that had a report that could not be scraped, their checkpoint stays at the page of the first one so a resume scrapes it again
+    # (the reports after it that were ingested are in the index of ingested reports, so the resume skips them)
+    held = set()
+
+    # Write every scraped page to the database until every shard has stopped
+    running = len(threads)
+    pagesWritten = 0
+    while running > 0:
+        checkpoint, reports, page, failed = pageQueue.get()
+
+        if page is None:
+            running -= 1
+
+            if checkpoint.pk in held:
+                logging.error(f"Backfill shard from {checkpoint.startDate} to {checkpoint.endDate} has reports that could not be scraped, resume the backfill to scrape them again from offset {checkpoint.offset}")
+            elif reports is None:
+                # Every page of the shard has been scraped
+                checkpoint.finished = True
+                checkpoint.save()
+            else:
+                logging.error(f"Backfill shard from {checkpoint.startDate} to {checkpoint.endDate} stopped at offset {checkpoint.offset}: {reports}")
+            continue
+
+        for link, notificationDate in failed:
+            logging.warning(f"Backfill could not scrape {link} ({notificationDate})")
+        if failed:
+            held.add(checkpoint.pk)
+
+        # Save the transactions, mark their reports as ingested, and move the checkpoint to the next page together
+        began = time.monotonic()
+        with transaction.atomic():
+            tickers, congressPeople = updateDB(page)
+            recordScrapedReports(reports)
+
+            if checkpoint.pk not in held:
+                checkpoint.offset += pageLength
+                checkpoint.save()
+        stats['write'].record(len(reports), time.monotonic() - began, len(page))
+
+        tickerIds |= tickers
+        congressPersonIds |= congressPeople
+
+        # Log the throughput of every stage every ten pages
+        pagesWritten += 1
+        if pagesWritten % 10 == 0:
+            logStats(stats)
+
+    for thread in threads:
+        thread.join()
+
+    logStats(stats)
+
+    # Update the CongressPerson and Ticker summary stats, only the ones that had new trades have changed
+    updateTickerStats(tickerIds)
+    updateCongressPersonStats(congressPersonIds)
+
+    # Recompute the sector and industry stats (the timeframes move with the date, so they are recomputed even when there were no new trades)
+    updateSectorStats(tickerIds)
@@ -0,0 +1,146 @@
+# Purpose: Local stand-in for efdsearch.senate.gov, so the scraper can be benchmarked without sending requests to the real website
+
+# Import Libraries
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+from pathlib import Path
+import threading
+import datetime
+import secrets
+import json
+import time
+
+# Directory of the periodic transaction report pages the server returns
+fixturesDirectory = Path(__file__).resolve().parent / 'data' / 'ptr'
+
+# FAKE EFDSEARCH WEBSITE
+'''
+Serves the parts of the website the scraper uses
+## /search/home/: the terms of service page, which sets the csrftoken cookie (GET) and validates it (POST)
+## /search/report/data/: the paginated search results as json
+## /search/view/ptr/<number>/: the periodic transaction reports, which are the html pages in the fixtures directory (used in turn)
+
+latency is the number of seconds every response is delayed by
+rateLimit is the number of requests per second the server accepts, any request over that gets a 429 response with a Retry-After header (0 for no limit)
+'''
+class FakeEfdsearch(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, reports=500, latency=0, rateLimit=0, fixtures=fixturesDirectory):
+        super().__init__(('127.0.0.1', port), FakeEfdsearchHandler)
+
+        self.reports = reports
+        self.latency = latency
+        self.rateLimit = rateLimit
+        self.pages = [path.read_text(encoding='utf-8') for path in sorted(Path(fixtures).glob('*.html'))]
+
+        # Token bucket for the rate limit
+        self.tokens = rateLimit
+        self.lastRefill = time.monotonic()
+        self.lock = threading.Lock()
+
+        # Number of requests that were answered, and how many of them were rate limited
+        self.requests = 0
+        self.rateLimited = 0
+
+    # Address of the server, to use in place of https://efdsearch.senate.gov
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    # Take a token from the bucket, returns False if the request is over the rate limit
+    def allow(self):
+        with self.lock:
+            self.requests += 1
+
+            if not self.rateLimit:
+                return True
+
+            now = time.monotonic()
+            self.tokens = min(self.rateLimit, self.tokens + (now - self.lastRefill) * self.rateLimit)
+            self.lastRefill = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+
+            self.rateLimited += 1
+            return False
+
+    # Run the server on a background thread
+    def startInBackground(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+# Answers the requests sent to the fake website
+class FakeEfdsearchHandler(BaseHTTPRequestHandler):
+    # Do not log every request
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.respond(None)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {name: values[0] for name, values in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+        self.respond(form)
+
+    # Send a response
+    def send(self, status, body, contentType='text/html', headers=None):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', contentType)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    # form is the posted form, or None for GET requests
+    def respond(self, form):
+        server = self.server
+
+        time.sleep(server.latency)
+
+        if not server.allow():
+            self.send(429, 'Too Many Requests', headers={'Retry-After': '1'})
+            return
+
+        # Terms of service page, both requests set the csrftoken cookie
+        if self.path == '/search/home/':
+            self.send(200, '<html><body>Terms of service</body></html>', headers={'Set-Cookie': f'csrftoken={secrets.token_hex(16)}; Path=/'})
+
+        # Search results
+        elif self.path == '/search/report/data/' and form is not None:
+            start = int(form.get('start', 0))
+            length = int(form.get('length', 100))
+
+            # Every report is filed by the same senator on a different day
+            data = []
+            for number in range(start, min(start + length, server.reports)):
+                notificationDate = datetime.date(2012, 1, 1) + datetime.timedelta(days=number % 3650)
+                data.append([
+                    'Jane', 'Doe', 'Doe, Jane (Senator)',
+                    f'<a href="/search/view/ptr/{number}/" target="_blank">Periodic Transaction Report for {notificationDate:%m/%d/%Y}</a>',
+                    f'{notificationDate:%m/%d/%Y}',
+                ])
+
+            self.send(200, json.dumps({'recordsTotal': server.reports, 'recordsFiltered': server.reports, 'data': data}), 'application/json')
+
+        # Periodic transaction reports
+        elif self.path.startswith('/search/view/ptr/') and server.pages:
+            number = int(self.path.strip('/').split('/')[-1])
+            self.send(200, server.pages[number % len(server.pages)])
+
+        else:
+            self.send(404, 'Not Found')
+
+# Run the fake website on its own: "python -m congress.scripts.fakeEfdsearch 8001"
+if __name__ == '__main__':
+    import sys
+
+    server = FakeEfdsearch(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8001)
+    print(f"Serving a fake efdsearch.senate.gov on {server.url}")
+    server.serve_forever()
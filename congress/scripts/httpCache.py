@@ -0,0 +1,75 @@
+# Purpose: On-disk cache of the responses of efdsearch.senate.gov, so reports that never change once they are filed are only downloaded once, and the scraper can run without a network connection
+
+# Import Libraries
+from pathlib import Path
+import threading
+import hashlib
+import json
+import gzip
+import os
+
+# A response that was loaded from the cache, it has the parts of a requests.Response that the scraper uses
+class CachedResponse:
+    def __init__(self, url, status_code, text):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = {}
+
+    # load the response as json
+    def json(self):
+        return json.loads(self.text)
+
+    # only successful responses are cached
+    def raise_for_status(self):
+        pass
+
+# CACHE OF THE WEBSITE RESPONSES
+'''
+Every response is saved in its own gzipped file, named by the hash of the url and payload of its request
+The CSRF token is left out of the hash, it changes every run but does not change the response
+
+The cache has two modes
+## record: requests still go to the website and their responses are saved, periodic transaction reports that are already in the cache are not downloaded again (they never change once they are filed)
+## replay: every response comes from the cache and nothing is sent to the website, a request that is not in the cache fails
+'''
+class ResponseCache:
+    def __init__(self, directory, mode='record'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cache mode: {mode}")
+
+        self.directory = Path(directory)
+        self.mode = mode
+
+    # Hash of the url and payload of a request
+    def key(self, url, payload):
+        payload = {name: str(value) for name, value in payload.items() if name != 'csrfmiddlewaretoken'}
+        return hashlib.sha256(json.dumps([url, payload], sort_keys=True).encode('utf-8')).hexdigest()
+
+    # Path of the file the response of a request is saved in, the files are split into subdirectories by the first two characters of their hash
+    def path(self, url, payload):
+        key = self.key(url, payload)
+        return self.directory / key[:2] / f"{key}.json.gz"
+
+    # Get the response of a request from the cache, or None if it has not been cached
+    def get(self, url, payload):
+        path = self.path(url, payload)
+
+        if not path.exists():
+            return None
+
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            cached = json.load(file)
+
+        return CachedResponse(cached['url'], cached['status'], cached['text'])
+
+    # Save the response of a request in the cache
+    def put(self, url, payload, response):
+        path = self.path(url, payload)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first and then rename it, so a scrape that is killed (or another worker reading the cache) never sees half a file
+        temporary = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(temporary, 'wt', encoding='utf-8') as file:
+            json.dump({'url': url, 'status': response.status_code, 'text': response.text}, file)
+        os.replace(temporary, path)
@@ -0,0 +1,83 @@
+# Purpose: Write and read scraped transactions as NDJSON (one json object per line), so they can be streamed to and from disk one transaction at a time
+
+# Import Libraries
+import json
+
+# Write every record to an open file as its own line, returns the number of records written
+def writeRecords(records, file):
+    count = 0
+
+    for record in records:
+        file.write(json.dumps(record, ensure_ascii=False))
+        file.write('\n')
+        count += 1
+
+    return count
+
+# Generator that reads the records of a json array from an open file one at a time, without loading the whole array
+# Only a buffer of bufferSize characters (plus the record being read) is held in memory
+def readJsonArray(file, bufferSize=65536):
+    decoder = json.JSONDecoder()
+
+    # Skip the whitespace before the array, reading more of the file until there is something else
+    buffer = ''
+    while not buffer.strip():
+        buffer = file.read(bufferSize)
+        if not buffer:
+            raise ValueError("The file does not contain a json array")
+
+    # Skip the opening bracket of the array
+    buffer = buffer.lstrip()
+    if buffer[0] != '[':
+        raise ValueError("The file does not start with a json array")
+    position = 1
+
+    while True:
+        # Skip the whitespace and commas between records, reading more of the file when we reach the end of the buffer
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+
+        if position == len(buffer):
+            more = file.read(bufferSize)
+            if not more:
+                return
+            buffer, position = more, 0
+            continue
+
+        # The end of the array
+        if buffer[position] == ']':
+            return
+
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # The record continues past the end of the buffer, so keep the start of the record and read more of the file
+            more = file.read(bufferSize)
+            if not more:
+                raise
+            buffer, position = buffer[position:] + more, 0
+            continue
+
+        yield record
+
+# Generator that reads the records of a file one at a time
+'''
+The file is NDJSON, one record per line
+Files written before we switched to NDJSON hold a single json array of records, those are streamed with readJsonArray
+'''
+def readRecords(path):
+    with open(path, encoding='utf-8') as file:
+        # Check whether the file starts with a json array
+        firstCharacter = file.read(1)
+        while firstCharacter.isspace():
+            firstCharacter = file.read(1)
+        file.seek(0)
+
+        if firstCharacter == '[':
+            yield from readJsonArray(file)
+            return
+
+        for line in file:
+            # skip empty lines
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,157 @@
+# Purpose: Parsers that extract the transactions table from a periodic transaction report html page
+# Every parser returns exactly the same rows, they only differ in how fast they are (see "python manage.py benchmarkParsers")
+
+# Import Libraries
+from .cleanText import cleanText
+from bs4 import BeautifulSoup, Comment
+
+# lxml is much faster than BeautifulSoup, but the scraper can still run with BeautifulSoup if it is not installed
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# PARSE PERIODIC TRANSAACTION REPORT HTML PAGE WITH BEAUTIFULSOUP
+'''
+Find the table in the html page, and iterate through its rows
+Every row contains the name, notificationDate, and url of the report followed by the text of every column except for the first one
+## The ticker column is a list of the ticker and the link to the stock on yahoo finance when it has a link
+## The asset name column is a list of the asset name and the text of its nested divs when it has any
+## The asset name is the first text in the column, html comments are skipped
+'''
+def parseBS4(html, name, notificationDate, url):
+    # Add all the periodic transaction data to this list
+    tableData = []
+
+    # Parse HTML
+    parsedData = BeautifulSoup(html, 'html.parser')
+
+    # Get the table
+    table = parsedData.find('table')
+
+    # Get the rows from the table
+    rows = table.find_all('tr')
+
+    # iterate through the rows
+    for i, row in enumerate(rows):
+        # we do not have to scrape the first row so we can ignore this iteration
+        if i == 0:
+            continue
+
+        # find all the table data
+        tds = row.find_all("td")
+
+        # Store the rows data within this list. We want each periodic transaction to include the name, notificationDate, and url, and since we already have that data at this point, we will add them to the list
+        rowData = [name, notificationDate, url]
+
+        # iterate through the table data
+        for i, td in enumerate(tds):
+            # Do not record data from the first column we can ignore this iteration
+            if i == 0:
+                continue
+            # If the ticker column contains a stock ticker, it also has a link to that stock on yahoo fiannce
+            if i == 3:
+                # check to see if theres an a tag in the table
+                if td.find('a') != None:
+                    link = td.find('a')
+                    rowData.append([link.text, link.get('href')])
+                else:
+                    #if there isnt clean the text
+                    rowData.append(cleanText(td.text.strip()))
+            # If the Asset Name column contains extra text in nested div, collect that information
+            elif i == 4:
+                # check to see if theres a div tag in the td
+                if td.find('div') != None:
+                    # asset name, the first text in the column that is not an html comment
+                    mainText = [content for content in td.contents if not isinstance(content, Comment)][0]
+                    if not isinstance(mainText, str):
+                        raise ValueError("Asset name column does not start with text")
+                    mainText = mainText.strip()
+                    #
+                    subtext = td.find_all( 'div', {'class': 'text-muted'} )
+                    subtextArray = []
+
+                    for i in subtext:
+                        subtextArray.append(cleanText(i.text.strip()))
+
+                    rowData.append([mainText, subtextArray])
+                else:
+                    rowData.append(cleanText(td.text.strip()))
+            else:
+                rowData.append(cleanText(td.text.strip()))
+
+
+        tableData.append(rowData)
+
+    return tableData
+
+# First text in an lxml element, skipping html comments, or None if the element starts with another element
+# lxml keeps the text that follows a comment in the tail of the comment, BeautifulSoup keeps it as its own string
+def firstText(element):
+    if element.text is not None:
+        return element.text
+
+    for child in element:
+        if child.tag is not lxml.etree.Comment:
+            return None
+        if child.tail is not None:
+            return child.tail
+
+    return None
+
+# PARSE PERIODIC TRANSAACTION REPORT HTML PAGE WITH LXML
+# Walks the same table as parseBS4 and returns exactly the same rows, but builds the tree with lxml's C parser and looks up every element only once
+def parseLxml(html, name, notificationDate, url):
+    if lxml is None:
+        raise ImportError("lxml is not installed, install it or use the bs4 parser")
+
+    # Add all the periodic transaction data to this list
+    tableData = []
+
+    # Parse HTML and get the first table
+    table = next(lxml.html.document_fromstring(html).iter('table'))
+
+    # iterate through the rows, we do not have to scrape the first row
+    for i, row in enumerate(table.iter('tr')):
+        if i == 0:
+            continue
+
+        # The name, notificationDate, and url are the first values of every row
+        rowData = [name, notificationDate, url]
+
+        # iterate through the table data, the first column is not recorded
+        for i, td in enumerate(row.iter('td')):
+            if i == 0:
+                continue
+
+            # The ticker column, which has a link to the stock on yahoo finance when it contains a stock ticker
+            if i == 3:
+                link = td.find('.//a')
+                if link is not None:
+                    rowData.append([link.text_content(), link.get('href')])
+                    continue
+
+            # The asset name column, which can contain extra text in nested divs
+            elif i == 4 and td.find('.//div') is not None:
+                # The asset name is the first text in the column, html comments are skipped
+                mainText = firstText(td)
+                if mainText is None:
+                    # parseBS4 fails on these reports as well, so the parsers stay consistent
+                    raise ValueError("Asset name column does not start with text")
+
+                subtextArray = [cleanText(div.text_content().strip()) for div in td.iterdescendants('div') if 'text-muted' in (div.get('class') or '').split()]
+                rowData.append([mainText.strip(), subtextArray])
+                continue
+
+            rowData.append(cleanText(td.text_content().strip()))
+
+        tableData.append(rowData)
+
+    return tableData
+
+# Parsers by name
+parsers = {
+    'bs4': parseBS4,
+    'lxml': parseLxml,
+}
@@ -0,0 +1,40 @@
+# Purpose: Keep track of the throughput of every stage of the scraping pipeline (fetch, parse, write)
+
+# Import Libraries
+import threading
+
+# Throughput of a single stage
+class StageStats:
+    def __init__(self, name):
+        # name of the stage
+        self.name = name
+        # number of reports that went through the stage
+        self.reports = 0
+        # number of transactions that came out of the stage
+        self.rows = 0
+        # number of seconds the stage spent working (not waiting on the other stages)
+        self.seconds = 0
+
+        # stages run on different threads
+        self.lock = threading.Lock()
+
+    # Record a batch of reports that went through the stage
+    def record(self, reports, seconds, rows=0):
+        with self.lock:
+            self.reports += reports
+            self.rows += rows
+            self.seconds += seconds
+
+    # Human readable summary of the throughput of the stage
+    def __str__(self):
+        # avoid dividing by zero before the stage has done any work
+        seconds = self.seconds or 1e-9
+        return f"{self.name}: {self.reports} reports ({self.reports / seconds:.1f}/s), {self.rows} rows ({self.rows / seconds:.1f}/s) in {self.seconds:.1f}s"
+
+# Create the stats for every stage of the pipeline
+def pipelineStats():
+    return {
+        'fetch': StageStats('fetch'),
+        'parse': StageStats('parse'),
+        'write': StageStats('write'),
+    }
@@ -0,0 +1,75 @@
+# Purpose: Adaptive token bucket used by the senate scraper to stay as fast as efdsearch.senate.gov allows without getting blocked
+
+# Import Libraries
+import threading
+import time
+
+# Token bucket that every scraper worker has to take a token from before sending a request
+'''
+The bucket refills at "rate" tokens per second and can hold at most "capacity" tokens.
+
+The rate adapts to how the website is responding (additive increase / multiplicative decrease):
+## Every healthy response slowly raises the rate so we speed up while the website keeps up with us
+## Every 429 (Too Many Requests) or 5xx response halves the rate so we back off quickly when the website is struggling
+'''
+class RateLimiter:
+    def __init__(self, rate=0.5, capacity=1, minRate=0.1, maxRate=10, increase=0.05, decrease=0.5):
+        # requests per second we are currently allowed to send
+        self.rate = rate
+        # the lowest and highest rates the limiter can adapt to
+        self.minRate = minRate
+        self.maxRate = maxRate
+        # how much the rate goes up after a healthy response, and by what factor it goes down after an unhealthy one
+        self.increase = increase
+        self.decrease = decrease
+        # the maximum number of requests that can be sent in a burst
+        self.capacity = capacity
+
+        # start with a full bucket
+        self.tokens = capacity
+        self.lastRefill = time.monotonic()
+
+        # workers share the same limiter, so every change to the bucket happens under a lock
+        self.lock = threading.Lock()
+
+    # Add the tokens that have been earned since the last refill
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.lastRefill) * self.rate)
+        self.lastRefill = now
+
+    # Block until a token is available, then take it
+    def acquire(self):
+        while True:
+            with self.lock:
+                self.refill()
+
+                # if there is a token in the bucket, take it and send the request
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                # otherwise calculate how long until the next token is earned
+                wait = (1 - self.tokens) / self.rate
+
+            # sleep outside of the lock so other workers can report their responses in the meantime
+            time.sleep(wait)
+
+    # The website responded normally, so slowly speed up
+    def success(self):
+        with self.lock:
+            self.refill()
+            self.rate = min(self.maxRate, self.rate + self.increase)
+
+    # The website is rate limiting us or struggling, so slow down
+    # retryAfter is the number of seconds the website asked us to wait (Retry-After header), if it gave one
+    def backoff(self, retryAfter=None):
+        with self.lock:
+            self.refill()
+            self.rate = max(self.minRate, self.rate * self.decrease)
+
+            # empty the bucket so no worker sends another request before the website is ready
+            self.tokens = 0
+            if retryAfter:
+                # a negative token count makes every worker wait out the Retry-After period
+                self.tokens = -retryAfter * self.rate
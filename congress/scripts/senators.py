@@ -2,13 +2,16 @@
 # Purpose: This file will scrape data from the Senate website and return the data asJSON 
 
 # Import Libraries
-from .cleanText import cleanText
-from bs4 import BeautifulSoup
-import pandas as pd
+from .rateLimiter import RateLimiter
+from .pipeline import pipelineStats
+from .parsers import parsers
+from .httpCache import ResponseCache
+from .ndjson import writeRecords
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import threading
 import requests
 import logging
-import math
-import json
+import queue
 import time
 
 # Intialize Constant URL variables
@@ -24,11 +27,33 @@ reportURL = "https://efdsearch.senate.gov/search/report/data/"
 global prefixURL 
 prefixURL = "https://efdsearch.senate.gov"
 
-global session
-session = requests.Session() 
+# Session used by every request unless the caller gives its own (each shard of a sharded backfill has its own session)
+global defaultSession
+defaultSession = requests.Session() 
 
-global tableData
-tableData = []
+# Names of the values in every scraped transaction
+global columns
+columns = ['Name', 'Notification Date', 'Link', 'Transaction Date', 'Owner', 'Ticker', 'Asset Name', 'Asset Type', 'Type', 'Amount', 'Comment']
+
+# Every request to the website takes a token from this limiter, it starts at one request every two seconds and adapts to the websites responses
+global limiter
+limiter = RateLimiter()
+
+# On-disk cache of the websites responses (see httpCache.py), None when the cache is not used
+global cache
+cache = None
+
+# Parser used to parse the reports, see parsers.py for the available parsers
+global parserBackend
+parserBackend = 'bs4'
+
+# Number of reports on every page of search results
+global pageLength
+pageLength = 100
+
+# Number of times a report is retried after the website rate limits us (429) or has a server error (5xx)
+global maxRetries
+maxRetries = 5
 
 # BYPASS TERMS OF SERVICE PAGE 
 '''
@@ -38,7 +63,14 @@ Collect validated CSRF token through the cookies of the website.
 Once we validate the CSRF token we store in a variable so that we can have a validated CSRF token to implement future requests.
 '''
 # @Author: Mohammed-Al Rasheed
-def bypassTOS():    
+def bypassTOS(session=None):    
+    if session is None:
+        session = defaultSession
+
+    # When replaying from the cache we never talk to the website, so there is no CSRF token to validate
+    if cache is not None and cache.mode == 'replay':
+        return 'replay'
+
     try:
         # Get unvalidated CSRF token from cookies
         response = session.get(homeURL)
@@ -53,7 +85,7 @@ def bypassTOS():
 
         return csrfToken
     except Exception as e:
-        logging.error("Error in bypassTOS function: " + e)
+        logging.error("Error in bypassTOS function: " + str(e))
 
 
 
@@ -65,29 +97,43 @@ Send a request to the resulting table
 # Using the validated CSRF we can send a request to the search page, with a payload attached with all the preferred filters
 
 Going through all the pages of the table, the table is paginated iteratively
-# If there are is more than one page in the table we have to detect that and iterate through all the pages(POSSIBLY recursively)
+# searchReports is a generator that yields the reports on every page of the table before the next page is requested
 '''
-def getReports(csrfToken, start, reportType, startDate, lastName):    
-    try:
+# Each report is yielded as the tuple of arguments parseHTML needs: (csrfToken, link, name, notificationDate, session)
+# seen is an optional set of report links that have already been ingested, those reports are skipped without being downloaded
+# endDate is an optional last submission date, and session is the session the csrfToken was validated with
+def searchReports(csrfToken, start, reportType, startDate, lastName, seen=None, endDate=None, session=None):
+    while True:
         payload = {
             'start': str(start),
             'report_types': f'[{reportType}]',
             'submitted_start_date': f'{startDate} 00:00:00',
             'last_name': lastName,
-            'length': 100,
+            'length': pageLength,
+            # Sort by the date the report was received (the fifth column of the table), oldest first
+            # Without an explicit order the same offset can point to other reports on the next run, and a backfill is resumed by its offset
+            'order[0][column]': '4',
+            'order[0][dir]': 'asc',
             'csrfmiddlewaretoken': csrfToken
         }
 
+        # Only search up to the end date if we were given one
+        if endDate is not None:
+            payload['submitted_end_date'] = f'{endDate} 23:59:59'
+
         # Send request to and store the response
-        response = session.post(reportURL, data=payload, headers={'Referer': homeURL})
+        response = fetch(reportURL, payload, homeURL, session)
         
         # load the response as json
         jsonResponse = response.json()
         records = jsonResponse['data']
 
-        # if records is empty, then exit the script
+        # if records is empty, then we have gone through every page
         if records == []:
-            return records
+            return
+
+        # Collect the arguments parseHTML needs for every report on this page
+        reports = []
 
         # loop through the data
         for record in records:
@@ -101,19 +147,218 @@ def getReports(csrfToken, start, reportType, startDate, lastName):
             # slicing the string to only get the url from href tag in the HTML
             link = link[ link.find('="')+2 : link.find('" t') ]
 
-            # send informatio to parseHTML function to get the transaction data
-            parseHTML(csrfToken, link, name, notificationDate)
-        
-        # Calculate the number of pages in the table and round it the next highest 100
-        numOfPages = math.ceil(jsonResponse['recordsTotal'] / 100) * 100
+            # skip reports that have already been ingested
+            if seen is not None and prefixURL + link in seen:
+                continue
+
+            reports.append((csrfToken, link, name, notificationDate, session))
+
+        yield reports
         
-        # recurisvely go through all the pages until we reach the last page
-        if start != numOfPages:
-            return getReports(csrfToken, start+100, reportType, startDate, lastName)
+        # go to the next page until we reach the last page
+        start += pageLength
+        if start >= jsonResponse['recordsTotal']:
+            return
+
+# Turn the parsed rows of every report on a page into the page that is handed to the caller
+# results holds the rows of each report, or None if the report could not be scraped
+# Returns the (link, notification date) of every report that was scraped, the list of their transactions, and the (link, notification date) of every report that failed
+def toPage(reports, results):
+    scraped = []
+    transactions = []
+    failed = []
+
+    for report, rows in zip(reports, results):
+        # Keep reports that failed apart, so they are not treated as ingested and the caller can try them again on the next run
+        if rows is None:
+            failed.append((prefixURL + report[1], report[3]))
+            continue
+
+        scraped.append((prefixURL + report[1], report[3]))
+        transactions.extend(dict(zip(columns, row)) for row in rows)
+
+    return scraped, transactions, failed
+
+# SCRAPE EVERY PAGE OF REPORTS
+'''
+# getReports is a generator, every page of the table is scraped and yielded before the next page is requested
+# Each page is yielded as a tuple of the reports that were scraped, (link, notification date), the list of their transactions, and the reports that failed, (link, notification date)
+# This way the caller can save each page as soon as it is scraped, and we never hold more than one page in memory
+'''
+# executor is an optional thread pool. When it is given, all the reports on a page are fetched concurrently by its workers
+def getReports(csrfToken, start, reportType, startDate, lastName, executor=None, seen=None, endDate=None, session=None):    
+    try:
+        for reports in searchReports(csrfToken, start, reportType, startDate, lastName, seen, endDate, session):
+            # send information to parseHTML function to get the transaction data
+            if executor is None:
+                results = [parseHTML(*report) for report in reports]
+            else:
+                # The workers share our session and validated CSRF token, list() waits until every report on the page is done
+                results = list(executor.map(lambda report: parseHTML(*report), reports))
+
+            # hand the page to the caller
+            yield toPage(reports, results)
     except Exception as e:
         logging.error("Error in getReports function: " + str(e))
-    
-    
+        # Let the caller know the scrape did not finish, so it does not treat the reports it has not received as ingested
+        raise
+
+# SCRAPE EVERY PAGE OF REPORTS IN STAGES
+'''
+The scrape is split into stages that run at the same time and are joined by bounded queues
+## Fetch: a thread searches the pages of the table and downloads the reports on each page with a pool of I/O workers
+## Parse: a thread hands the downloaded reports to a pool of processes, so parsing does not compete with the network threads for the GIL
+## Write: the caller, which receives the parsed pages exactly like it would from getReports
+The queues only hold a few pages, so a slow stage makes the faster stages wait instead of using more memory
+'''
+# stats is an optional dictionary of pipeline.StageStats for the "fetch" and "parse" stages
+def stagedReports(csrfToken, start, reportType, startDate, lastName, fetchWorkers, parseWorkers, queueSize=2, seen=None, endDate=None, session=None, stats=None):
+    if stats is None:
+        stats = pipelineStats()
+
+    fetched = queue.Queue(maxsize=queueSize)
+    parsed = queue.Queue(maxsize=queueSize)
+
+    # Set when the caller stops early (or the scrape fails), so the stages stop instead of waiting on a full or empty queue forever
+    stop = threading.Event()
+
+    # Put an item on a queue, returns False if the scrape was stopped while waiting for room on the queue
+    def put(items, item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # Get an item from a queue, returns None if the scrape was stopped while waiting for an item
+    def get(items):
+        while not stop.is_set():
+            try:
+                return items.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    # Search and download every page of reports
+    def fetchStage():
+        try:
+            with ThreadPoolExecutor(max_workers=fetchWorkers) as executor:
+                for reports in searchReports(csrfToken, start, reportType, startDate, lastName, seen, endDate, session):
+                    began = time.monotonic()
+                    htmls = list(executor.map(lambda report: fetchHTML(*report), reports))
+                    stats['fetch'].record(len(reports), time.monotonic() - began)
+
+                    if not put(fetched, (reports, htmls)):
+                        return
+
+            # None tells the next stage that every page has been fetched
+            put(fetched, None)
+        except Exception as e:
+            put(fetched, e)
+
+    # Parse every downloaded page
+    def parseStage():
+        try:
+            with ProcessPoolExecutor(max_workers=parseWorkers) as pool:
+                while True:
+                    item = get(fetched)
+
+                    # pass on the end of the scrape (or the error that ended it)
+                    if item is None or isinstance(item, Exception):
+                        put(parsed, item)
+                        return
+
+                    reports, htmls = item
+                    began = time.monotonic()
+
+                    # (html, name, notificationDate, url, backend) for every report, the backend is passed along as the processes do not share our globals
+                    arguments = [(html, report[2], report[3], prefixURL + report[1], parserBackend) for report, html in zip(reports, htmls)]
+                    results = list(pool.map(parseReport, *zip(*arguments))) if arguments else []
+
+                    page = toPage(reports, results)
+                    stats['parse'].record(len(reports), time.monotonic() - began, len(page[1]))
+
+                    if not put(parsed, page):
+                        return
+        except Exception as e:
+            # The pool can fail too (for example when a process is killed), the caller would wait for the next page forever otherwise
+            put(parsed, e)
+
+    threads = [threading.Thread(target=fetchStage, daemon=True), threading.Thread(target=parseStage, daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        # Hand every parsed page to the caller (the write stage)
+        while True:
+            item = parsed.get()
+
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                logging.error("Error in stagedReports function: " + str(item))
+                raise item
+
+            yield item
+    finally:
+        # Stop the stages when the caller stops early or the scrape failed, leaving the pools shuts them down
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+# SEND A RATE LIMITED REQUEST
+'''
+Wait for a token from the limiter before every request
+If the website rate limits us (429) or has a server error (5xx) tell the limiter to back off and retry the request
+Otherwise tell the limiter the website is healthy so it can speed up
+'''
+def fetch(url, payload, referer, session=None):
+    if session is None:
+        session = defaultSession
+
+    if cache is not None:
+        # Search results change as new reports are filed, so they only come from the cache when replaying
+        # Reports never change once they are filed, so they always come from the cache when they are in it
+        if cache.mode == 'replay' or url != reportURL:
+            cached = cache.get(url, payload)
+            if cached is not None:
+                return cached
+
+        if cache.mode == 'replay':
+            raise LookupError(f"{url} is not in the cache")
+
+    for attempt in range(maxRetries + 1):
+        limiter.acquire()
+        response = session.post(url, data=payload, headers={'Referer': referer})
+
+        if response.status_code == 429 or response.status_code >= 500:
+            # Retry-After is given in seconds by the website when it rate limits us
+            retryAfter = response.headers.get('Retry-After')
+            limiter.backoff(float(retryAfter) if retryAfter and retryAfter.isdigit() else None)
+            logging.warning(f"Received {response.status_code} from {url}, backing off to {limiter.rate:.2f} requests per second")
+            continue
+
+        limiter.success()
+
+        # Save the response so it does not have to be downloaded again
+        if cache is not None and cacheable(url, response):
+            cache.put(url, payload, response)
+
+        return response
+
+    # Give up on this request after too many failed attempts
+    response.raise_for_status()
+
+# Check if a response can be saved in the cache
+# When the session or the CSRF agreement expires the website redirects to the home page, which must not be saved as the response of the request
+# Reports are only saved with their table of transactions, so a page that can not be parsed is downloaded again by the next run
+def cacheable(url, response):
+    if response.history or response.url != url:
+        return False
+
+    return url == reportURL or '<table' in response.text
 
 # SCRAPE DATA FROM EACH RECORD
 '''
@@ -124,12 +369,13 @@ Scrape all the data from the from each row iteratively as well
 ## We retrieve the html page from the previous request and parse the html file for a table
 ## Than we iterate through the table and store each row in our local database
 '''
-# PARSE PERIODIC TRANSAACTION REPORT HTML PAGE
-def parseHTML(csrfToken, link, name, notificationDate):
+# DOWNLOAD PERIODIC TRANSAACTION REPORT HTML PAGE
+# Returns the html of the report, an empty string for paper reports, or None if the report could not be downloaded
+def fetchHTML(csrfToken, link, name, notificationDate, session=None):
     try:
         if "paper" in link:
             # This means that the link is a pdf report and thus unscrapable
-            return False
+            return ''
         
         # Send request to link with our CSRF token, and retrieve the html file    
         payload = {
@@ -137,103 +383,97 @@ def parseHTML(csrfToken, link, name, notificationDate):
         }
         
         url = prefixURL + link
-        response = session.post(url, data=payload, headers={'Referer': reportURL})
+        response = fetch(url, payload, reportURL, session)
 
-        # Parse HTML
-        parsedData = BeautifulSoup(response.text, 'html.parser')
-
-        # Get the table
-        table = parsedData.find('table')
-
-        # Get the rows from the table
-        rows = table.find_all('tr')
+        return response.text
+    except Exception as e:
+        # Log the error for debugging purposes as we scale the database
+        logging.error('Error occured in the fetchHTML function: ' + str(e))
 
-        # Add all the periodic transaction data to this list
-        # tableData = []
+# PARSE PERIODIC TRANSAACTION REPORT HTML PAGE
+# Returns a list with the data of every row in the report, or None if the report could not be downloaded or parsed
+# This does not use the network, so it can run in another process
+# backend is the name of the parser in parsers.py to use, parserBackend by default
+def parseReport(html, name, notificationDate, url, backend=None):
+    # the report could not be downloaded
+    if html is None:
+        return None
 
-        # iterate through the rows
-        for i, row in enumerate(rows):
-            # we do not have to scrape the first row so we can ignore this iteration
-            if i == 0:
-                continue
-        
-            # find all the table data
-            tds = row.find_all("td")
-
-            # Store the rows data within this list. We want each periodic transaction to include the name, notificationDate, and url, and since we already have that data at this point, we will add them to the list
-            rowData = [name, notificationDate, url]
-            
-            # iterate through the table data
-            for i, td in enumerate(tds):
-                # Do not record data from the first column we can ignore this iteration
-                if i == 0:
-                    continue
-                # If the ticker column contains a stock ticker, it also has a link to that stock on yahoo fiannce
-                if i == 3:
-                    # check to see if theres an a tag in the table
-                    if td.find('a') != None:
-                        link = td.find('a')
-                        rowData.append([link.text, link.get('href')])
-                    else:
-                        #if there isnt clean the text
-                        rowData.append(cleanText(td.text.strip()))
-                # If the Asset Name column contains extra text in nested div, collect that information
-                elif i == 4:
-                    # check to see if theres a div tag in the td
-                    if td.find('div') != None:
-                        # asset name
-                        mainText = td.contents[0].strip()
-                        #
-                        subtext = td.find_all( 'div', {'class': 'text-muted'} )
-                        subtextArray = []
-
-                        for i in subtext:
-                            subtextArray.append(cleanText(i.text.strip()))
-
-                        rowData.append([mainText, subtextArray])
-                    else:
-                        rowData.append(cleanText(td.text.strip()))
-                else:
-                    rowData.append(cleanText(td.text.strip()))
-
-
-            # tableData.append(rowData)
-            tableData.append(rowData)
-        
+    try:
+        # paper reports do not have any html to parse
+        if html == '':
+            return []
 
-        # Avoid rate limit on website by delaying the program for two seconds
-        time.sleep(2)
+        return parsers[backend or parserBackend](html, name, notificationDate, url)
     except Exception as e:
         # Log the error for debugging purposes as we scale the database
-        logging.error('Error occured in the parseHTML function: ' + e)
-
-# @Author: Mohammed-Al Rasheed
-def main(startDate):
+        logging.error('Error occured in the parseReport function: ' + str(e))
+        return None
+
+# DOWNLOAD AND PARSE PERIODIC TRANSAACTION REPORT HTML PAGE
+# Returns a list with the data of every row in the report, or None if the report could not be downloaded or parsed
+def parseHTML(csrfToken, link, name, notificationDate, session=None):
+    html = fetchHTML(csrfToken, link, name, notificationDate, session)
+    return parseReport(html, name, notificationDate, prefixURL + link)
+
+# SCRAPE ALL PERIODIC TRANSACTION REPORTS SUBMITTED SINCE startDate
+# Generator that yields the reports and their transactions one page at a time (see getReports)
+# workers is the number of reports fetched at the same time, the rate limiter keeps all of them within what the website allows
+# seen is an optional set of report links to skip
+# start is the offset of the first page of search results to scrape, every yielded page moves the offset forward by pageLength
+# endDate is an optional last submission date
+# session is an optional requests session to scrape with, so several scrapes can run at the same time each with their own validated CSRF token
+# parseWorkers is the number of processes that parse the reports, when it is given the scrape runs in stages (see stagedReports) and stats receives the throughput of each stage
+def scrape(startDate, workers=1, seen=None, start=0, endDate=None, session=None, parseWorkers=0, stats=None):
     # Get validated CSRF token
-    CSRF = bypassTOS()
+    CSRF = bypassTOS(session)
     
     # Filters for Get Reports
-    start = 0
     # Report Type 11 means the "periodic transactions" filter
     reportType = 11
     # startDate = "01/01/2012"
     lastName = ''
 
     # Get Reports
-    records = getReports(CSRF, start, reportType, startDate, lastName)
+    if parseWorkers > 0:
+        # Fetch, parse, and write in separate stages
+        yield from stagedReports(CSRF, start, reportType, startDate, lastName, workers, parseWorkers, seen=seen, endDate=endDate, session=session, stats=stats)
+    elif workers > 1:
+        # Bounded pool of workers that share the session and CSRF token
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from getReports(CSRF, start, reportType, startDate, lastName, executor, seen, endDate, session)
+    else:
+        yield from getReports(CSRF, start, reportType, startDate, lastName, seen=seen, endDate=endDate, session=session)
+
+# Send every request to another copy of the website (for example the fake website in fakeEfdsearch.py)
+# prefix is the address of the website, "https://efdsearch.senate.gov" by default
+def useWebsite(prefix="https://efdsearch.senate.gov"):
+    global homeURL, searchURL, reportURL, prefixURL
+    homeURL = prefix + "/search/home/"
+    searchURL = prefix + "/search/report/data/"
+    reportURL = prefix + "/search/report/data/"
+    prefixURL = prefix
+
+# Cache the websites responses in directory, mode is "record" or "replay" (see httpCache.py)
+# Pass None as the directory to stop using the cache
+def useCache(directory, mode='record'):
+    global cache
+    cache = ResponseCache(directory, mode) if directory else None
 
-    df = pd.DataFrame(tableData, columns =['Name', 'Notification Date', 'Link', 'Transaction Date', 'Owner', 'Ticker', 'Asset Name', 'Asset Type', 'Type', 'Amount', 'Comment']) 
+# @Author: Mohammed-Al Rasheed
+# Scrape every report submitted since startDate and append its transactions to the NDJSON file at path (one transaction per line)
+# Every page is written as soon as it is scraped, returns the number of transactions written
+def main(startDate, workers=1, path='transactions.ndjson'):
+    count = 0
 
-    # pandas dataframe to json
-    dfJson = df.to_json(orient='records')
-    parsedJson = json.loads(dfJson)
+    # Write to ndjson file, appending keeps the file valid as every line is its own json object
+    with open(path, 'a', encoding='utf-8') as outfile:
+        for reports, page, failed in scrape(startDate, workers):
+            count += writeRecords(page, outfile)
 
-    # Write to json file
-    outfile = open('transactions.json', 'a', encoding='utf-8')
-    outfile.write(json.dumps(parsedJson, ensure_ascii=False, indent=4))
-    outfile.close()
-    
-    return parsedJson
+    return count
     
 # run to populate from scratch
-main("1/1/2012")
+# Only run when this file is executed directly, so importing the scraper (populate.py does) does not start a full scrape
+if __name__ == '__main__':
+    main("1/1/2012", workers=8)
@@ -5,7 +5,8 @@
 from rest_framework.serializers import ModelSerializer, ReadOnlyField
 from rest_framework import serializers
 
-from .models import CongressTrade, CongressPerson, Ticker, SummaryStat
+from .models import CongressTrade, CongressPerson, Ticker, SummaryStat, TickerRollup, CongressPersonRollup, SectorStat
+import datetime
 
 # Abstraction is integrated due to django within all of these classes
 class TickerSerializer(serializers.ModelSerializer):
@@ -37,6 +38,51 @@ class CongressTradeSerializer(serializers.ModelSerializer):
         # fields = ('name', 'bioguide','firstName','lastName', 'ticker', 'transactionDate', 'assetType', 'transactionType', 'amount',  'ptrLink')
         fields = ('name', 'ticker', 'transactionDate', 'assetType', 'transactionType', 'amount',  'ptrLink')
 
+# FAST READ-ONLY SERIALIZATION
+'''
+The congress-trades and congress-all endpoints only return flat columns, so instead of creating a model object and running every serializer field for every row
+the rows are read as tuples with values_list and turned into the same dictionaries the serializers return (the JSON is byte for byte the same)
+## tradeValues / personValues turn a filtered queryset into the rows to paginate, serializeTrades / serializePeople turn a page of rows into the response data
+## "python manage.py benchmarkSerializers" compares them with the serializers above
+'''
+# Column of every field of CongressTradeSerializer, the fields of the congress person and ticker are read through their foreign key
+tradeRelations = {'name': 'name__fullName', 'ticker': 'ticker__ticker'}
+tradeColumns = [(field, tradeRelations.get(field, field)) for field in CongressTradeSerializer.Meta.fields]
+
+# Rows of congress trades with the columns of CongressTradeSerializer (and the id and transaction date the keyset pagination reads)
+def tradeValues(queryset):
+    columns = [column for field, column in tradeColumns]
+    if 'transactionDate' not in columns:
+        columns.append('transactionDate')
+    return queryset.values_list('id', *columns, named=True)
+
+# Same output as CongressTradeSerializer(rows, many=True).data
+def serializeTrades(rows):
+    data = []
+    for row in rows:
+        trade = {}
+        for field, column in tradeColumns:
+            value = getattr(row, column)
+
+            if value is None and field in tradeRelations:
+                # the serializer leaves the ticker (or congress person) out of trades that do not have one
+                continue
+            elif isinstance(value, datetime.date):
+                # dates are formatted as YYYY-MM-DD
+                value = value.isoformat()
+
+            trade[field] = value
+        data.append(trade)
+    return data
+
+# Rows of congress people with the columns of CongressPersonSerializer
+def personValues(queryset):
+    return queryset.values_list(*CongressPersonSerializer.Meta.fields)
+
+# Same output as CongressPersonSerializer(rows, many=True).data
+def serializePeople(rows):
+    return [dict(zip(CongressPersonSerializer.Meta.fields, row)) for row in rows]
+
 class SummaryStatSerializer(serializers.ModelSerializer):
     class Meta:
         # Database table
@@ -44,3 +90,33 @@ class SummaryStatSerializer(serializers.ModelSerializer):
         # Fields to appear on the response
         # __all__ includes all fields in the model in the response
         fields = "__all__"
+
+class TickerRollupSerializer(serializers.ModelSerializer):
+    # Average traded volume of the period (see TradeTotals.totalVolume)
+    totalVolume = ReadOnlyField()
+
+    class Meta:
+        # Database table
+        model = TickerRollup
+        # Fields to appear on the response
+        fields = ('periodStart', 'total', 'purchases', 'sales', 'totalVolume',)
+
+class CongressPersonRollupSerializer(serializers.ModelSerializer):
+    # Average traded volume of the period (see TradeTotals.totalVolume)
+    totalVolume = ReadOnlyField()
+
+    class Meta:
+        # Database table
+        model = CongressPersonRollup
+        # Fields to appear on the response
+        fields = ('periodStart', 'total', 'purchases', 'sales', 'totalVolume',)
+
+class SectorStatSerializer(serializers.ModelSerializer):
+    # Average traded volume of the sector or industry (see TradeTotals.totalVolume)
+    totalVolume = ReadOnlyField()
+
+    class Meta:
+        # Database table
+        model = SectorStat
+        # Fields to appear on the response
+        fields = ('kind', 'name', 'timeframe', 'total', 'purchases', 'sales', 'totalVolume',)
@@ -1,15 +1,112 @@
 # @Author: Mohammed-Al Rasheed
 # Purpose: Used in models.py to update the CongressPerson's tradesCount field 
 
+# Imports
+from .cache import bumpDataVersion
+import contextlib
+import threading
+
+# Stats updates that are waiting for the end of a deferStats block, kept per thread so a block only defers the saves made by its own thread
+deferred = threading.local()
+
+# DEFER STATS UPDATES
+'''
+Inside a "with deferStats():" block the signal handlers below do not update the stats of every object that is saved or deleted
+Instead the objects are collected, and their stats are updated once at the end of the block
+## Tickers and congress people are updated together with bulkUpdateStats (one aggregate query per 500 objects)
+## Summary stats are updated once per object, no matter how many times it was saved
+## The sector and industry stats are recomputed once, if the sector or industry of any ticker was edited in the block
+## The data version (see cache.py) is bumped once, if any object was saved or deleted in the block
+Nested blocks are part of the outermost block, and nothing is updated when the block raises an exception (the changes are usually rolled back anyway)
+'''
+@contextlib.contextmanager
+def deferStats():
+    # Nested block, the outermost block updates the stats
+    if getattr(deferred, 'pending', None) is not None:
+        yield
+        return
+
+    # objects whose stats have to be updated, by model and primary key
+    deferred.pending = {}
+    deferred.sectorsChanged = False
+    deferred.dataChanged = False
+    try:
+        yield
+        pending = deferred.pending
+        sectorsChanged = deferred.sectorsChanged
+        dataChanged = deferred.dataChanged
+    finally:
+        deferred.pending = None
+
+    updatePending(pending)
+
+    if sectorsChanged:
+        recomputeSectorStats()
+
+    if dataChanged:
+        bumpDataVersion()
+
+# Collect an object whose stats have to be updated, returns False if stats are not being deferred
+def defer(sender, instance):
+    pending = getattr(deferred, 'pending', None)
+    if pending is None:
+        return False
+
+    pending.setdefault(sender, {})[instance.pk] = instance
+    return True
+
+# Update the stats of every object that was collected during a deferStats block
+def updatePending(pending):
+    # models.py imports this file, so import the models when they are needed
+    from .models import Ticker, CongressPerson, bulkUpdateStats
+
+    for sender, instances in pending.items():
+        if sender is Ticker:
+            bulkUpdateStats(Ticker, 'ticker', instances.keys())
+        elif sender is CongressPerson:
+            bulkUpdateStats(CongressPerson, 'name', instances.keys())
+        else:
+            for instance in instances.values():
+                instance.updateStats()
+
+# Recompute every sector and industry stat when the sector or industry of a ticker was edited, as its trades are now counted under another sector
+# raw saves (loaddata) are skipped, the ingest scripts recompute the sector stats when they are done
+def tickerSectorUpdate(sender, instance, signal, raw=False, *args, **kwargs):
+    if raw or not instance.sectorsChanged():
+        return
+
+    # the next save only has to recompute the stats if the sector is edited again
+    instance.loadedSectors = instance.currentSectors()
+
+    if getattr(deferred, 'pending', None) is not None:
+        deferred.sectorsChanged = True
+    else:
+        recomputeSectorStats()
+
+# Recompute the stats of every sector and industry
+def recomputeSectorStats():
+    # models.py imports this file, so import the models when they are needed
+    from .models import updateSectorStats
+    updateSectorStats()
+
 # Update the stats of the summary stat object
 def summaryStatUpdate(sender, instance, signal, *args, **kwargs):
-    instance.updateStats()
+    if not defer(sender, instance):
+        instance.updateStats()
 
 # Update the stats of the ticker stat object
 def tickerStatUpdate(sender, instance, signal, *args, **kwargs):
-    instance.updateStats()
+    if not defer(sender, instance):
+        instance.updateStats()
 
 # Update the stats of the congress person stat object
 def congressPersonStatUpdate(sender, instance, signal, *args, **kwargs):
-    instance.updateStats()
+    if not defer(sender, instance):
+        instance.updateStats()
 
+# The data of the endpoints changed outside of the ingest scripts (for example in the admin), so the cached responses are no longer valid
+def dataChanged(sender, instance, signal, *args, **kwargs):
+    if getattr(deferred, 'pending', None) is not None:
+        deferred.dataChanged = True
+    else:
+        bumpDataVersion()
@@ -0,0 +1,533 @@
+# Purpose: Query count budgets of the government/ endpoints, so a change that adds a query per row (or per page) fails the tests
+# Run with: "python manage.py test congress"
+
+# Imports
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count, Q, Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from unittest import mock
+from api.operator import updateDB
+
+from .serializers import CongressTradeSerializer, CongressPersonSerializer, tradeValues, serializeTrades, personValues, serializePeople
+from .models import CongressPerson, Ticker, CongressTrade, ScrapeState, ScrapedReport, ScrapeCheckpoint, SummaryStat, SectorStat, DailyTradeRollup, TickerRollup, CongressPersonRollup, rebuildDailyRollups, rebuildPeriodRollups, updateSectorStats
+from .populate import current, backfill, updateDB as ingest
+from .cache import dataVersion
+from .scripts import senators
+from .scripts.rateLimiter import RateLimiter
+from .scripts.fakeEfdsearch import FakeEfdsearch, fixturesDirectory
+from .scripts.parsers import parsers
+from .scripts.ndjson import readJsonArray
+
+import threading
+import datetime
+import tempfile
+import base64
+import io
+
+# QUERY COUNT BUDGETS
+'''
+Every endpoint is requested with more rows in the database than fit on a page, and has to answer in a fixed number of queries
+The response cache is cleared before every test, so the queries of the endpoint itself are counted (a cached response runs none)
+'''
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Two congress people and three tickers
+        people = [CongressPerson.objects.create(fullName=f"Person {i}", currentParty='Party', currentChamber='Senate', currentState='State', image='') for i in range(2)]
+        tickers = [Ticker.objects.create(ticker=ticker, company=ticker, sector='Technology', industry='Software') for ticker in ('AAPL', 'MSFT', 'BRK.B')]
+
+        # 60 trades for every congress person and ticker pair, more than the 25 trades of a page
+        today = datetime.date.today()
+        for person in people:
+            for ticker in tickers:
+                for i in range(60):
+                    CongressTrade.objects.create(
+                        name=person,
+                        ticker=ticker,
+                        transactionDate=today - datetime.timedelta(days=i),
+                        disclosureDate=today,
+                        transactionType='Purchase' if i % 2 else 'Sale (Full)',
+                        amount='$1,001 - $15,000',
+                        owner='Self',
+                        assetDescription=ticker.company,
+                        assetType='Stock',
+                        ptrLink=f"https://efdsearch.senate.gov/search/view/ptr/{person.id}-{ticker.id}-{i}/",
+                        comment='',
+                        pdf=False,
+                    )
+
+        # Stats and rollups the ingest scripts keep up to date
+        for person in people:
+            person.updateStats()
+        for ticker in tickers:
+            ticker.updateStats()
+        SummaryStat.objects.create(timeframe=30)
+        rebuildDailyRollups()
+        rebuildPeriodRollups(TickerRollup, 'ticker')
+        rebuildPeriodRollups(CongressPersonRollup, 'name')
+        updateSectorStats()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    # Request an endpoint and check that it succeeds within its budget of queries
+    def assertBudget(self, url, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def testCongressTrades(self):
+        # count and page
+        response = self.assertBudget('/government/congress-trades/', 2)
+        self.assertEqual(len(response.data['results']), 25)
+
+    def testCongressTradesDeepPage(self):
+        self.assertBudget('/government/congress-trades/?limit=25&offset=300', 2)
+
+    def testCongressTradesCursor(self):
+        # the first page, and a page after the cursor (no count)
+        response = self.assertBudget('/government/congress-trades/?cursor=', 1)
+        self.assertBudget(response.data['next'], 1)
+
+    def testCongressAll(self):
+        self.assertBudget('/government/congress-all/', 2)
+
+    def testTicker(self):
+        response = self.assertBudget('/government/ticker/AAPL/', 2)
+        self.assertEqual(len(response.data['results']), 25)
+
+    def testTickerWithPeriod(self):
+        # tickers with a period are passed with a dash
+        self.assertBudget('/government/ticker/BRK-B/', 2)
+
+    def testTickerCursor(self):
+        response = self.assertBudget('/government/ticker/AAPL/?cursor=', 1)
+        self.assertBudget(response.data['next'], 1)
+
+    def testCongressPerson(self):
+        response = self.assertBudget('/government/congress-person/Person 0/', 2)
+        self.assertEqual(len(response.data['results']), 25)
+
+    def testCongressPersonCursor(self):
+        response = self.assertBudget('/government/congress-person/Person 0/?cursor=', 1)
+        self.assertBudget(response.data['next'], 1)
+
+    def testTickerStats(self):
+        self.assertBudget('/government/ticker-stats/AAPL/', 2)
+
+    def testCongressStats(self):
+        self.assertBudget('/government/congress-stats/Person 0/', 2)
+
+    def testSummaryStats(self):
+        # stored timeframe
+        self.assertBudget('/government/summary-stats/30/', 1)
+
+    def testSummaryStatsAnyTimeframe(self):
+        # timeframe that is calculated from the daily rollups
+        self.assertBudget('/government/summary-stats/45/', 2)
+        self.assertBudget('/government/summary-stats/?start=2000-01-01&end=2100-01-01', 1)
+
+    def testSummaryStatsTimeframeTooLong(self):
+        # a timeframe that would start before the first day a date can have
+        for timeframe in (1000000, 10 ** 30):
+            self.assertEqual(self.client.get(f'/government/summary-stats/{timeframe}/').status_code, 400)
+
+        # the longest timeframe still works
+        timeframe = (datetime.date.today() - datetime.date.min).days + 1
+        self.assertBudget(f'/government/summary-stats/{timeframe}/', 2)
+
+    def testTickerSeries(self):
+        self.assertBudget('/government/ticker-series/AAPL/?interval=week', 1)
+
+    def testCongressSeries(self):
+        self.assertBudget('/government/congress-series/Person 0/?interval=month', 1)
+
+    def testSectorStats(self):
+        self.assertBudget('/government/sector-stats/?kind=sector&timeframe=30', 2)
+
+    def testCachedResponse(self):
+        # the second request is answered from the cache
+        self.assertBudget('/government/congress-trades/', 2)
+        self.assertBudget('/government/congress-trades/', 0)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'example.com'])
+    def testCachedPerHost(self):
+        # the next link is an absolute url, so every scheme and host has its own cached response
+        self.client.get('/government/congress-trades/')
+        response = self.client.get('/government/congress-trades/', HTTP_HOST='example.com', secure=True)
+        self.assertTrue(response.data['next'].startswith('https://example.com/'))
+
+    def testFailedUpdateChangesVersion(self):
+        # pages committed before an update fails have changed the data, so the cached responses are stale either way
+        version = dataVersion()
+        with mock.patch('api.operator.currentPopulate', side_effect=RuntimeError('scrape failed')):
+            with self.assertRaises(RuntimeError):
+                updateDB()
+        self.assertGreater(dataVersion(), version)
+
+    def testEditChangesVersion(self):
+        # an edit outside of the ingest scripts (for example in the admin) is not answered from the cache
+        self.client.get('/government/ticker-stats/AAPL/')
+        ticker = Ticker.objects.get(ticker='AAPL')
+        ticker.company = 'Apple'
+        ticker.save()
+        self.assertEqual(self.assertBudget('/government/ticker-stats/AAPL/', 2).data['results'][0]['company'], 'Apple')
+
+    def testNotModified(self):
+        # a client that already has the response gets a 304 without any query
+        etag = self.client.get('/government/ticker/AAPL/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/government/ticker/AAPL/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+# FAST SERIALIZATION
+# The fast path of congress-trades and congress-all has to render exactly the same JSON as the serializers
+class FastSerializationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        person = CongressPerson.objects.create(fullName='Person', currentParty='Party', currentChamber='Senate', currentState='State', image='', totalVolumeTransactions=None)
+        CongressPerson.objects.create(fullName='Other Person', currentParty='', currentChamber='', currentState='', image='https://example.com/image.png', totalTransactions=3, purchases=2, sales=1)
+        ticker = Ticker.objects.create(ticker='AAPL')
+
+        # a trade with a ticker, and trades without a ticker or a transaction date
+        CongressTrade.objects.create(name=person, ticker=ticker, transactionDate=datetime.date(2022, 1, 5), transactionType='Purchase', amount='$1,001 - $15,000', owner='Self', assetType='Stock', ptrLink='https://efdsearch.senate.gov/1/', pdf=False)
+        CongressTrade.objects.create(name=person, ticker=None, transactionDate=datetime.date(2021, 12, 31), transactionType='Sale (Full)', amount='Over $50,000,000', owner='Spouse', assetType='Corporate Bond', ptrLink='https://efdsearch.senate.gov/2/', pdf=False)
+        CongressTrade.objects.create(name=person, ticker=ticker, transactionDate=None, transactionType='Exchange', amount='', owner='Self', assetType='', ptrLink='https://efdsearch.senate.gov/3/', pdf=False)
+
+    def testTrades(self):
+        trades = CongressTrade.objects.select_related('name', 'ticker').order_by('id')
+        expected = JSONRenderer().render(CongressTradeSerializer(trades, many=True).data)
+        self.assertEqual(JSONRenderer().render(serializeTrades(tradeValues(trades))), expected)
+
+    def testTradeFields(self):
+        # the fast path follows the fields of the serializer, in the same order
+        trades = serializeTrades(tradeValues(CongressTrade.objects.filter(ticker__isnull=False, transactionDate__isnull=False)))
+        self.assertEqual(tuple(trades[0]), CongressTradeSerializer.Meta.fields)
+
+    def testPeople(self):
+        people = CongressPerson.objects.order_by('id')
+        expected = JSONRenderer().render(CongressPersonSerializer(people, many=True).data)
+        self.assertEqual(JSONRenderer().render(serializePeople(personValues(people))), expected)
+
+# RETRYING FAILED REPORTS
+# A report that could not be scraped is not ingested, and the next run has to start early enough to scrape it again
+@mock.patch('congress.populate.getTickerData', return_value=('Technology', 'Software', 'Company', 0, 'EQUITY'))
+class ScrapeRetryTests(TestCase):
+    def setUp(self):
+        # Three reports filed on 01/01/2012, 01/02/2012, and 01/03/2012, the second one can not be parsed
+        self.server = FakeEfdsearch(reports=3)
+        self.report = (fixturesDirectory / 'stocks.html').read_text(encoding='utf-8')
+        self.server.pages = [self.report, '<html><body>Not a report</body></html>', self.report]
+        self.server.startInBackground()
+
+        # Point the scraper at the fake website, without waiting between requests
+        self.limiter = senators.limiter
+        senators.useWebsite(self.server.url)
+        senators.limiter = RateLimiter(rate=1000, maxRate=1000)
+
+        ScrapeState.objects.create(name='senate', highWaterMark=datetime.date(2012, 1, 1))
+
+    def tearDown(self):
+        senators.useWebsite()
+        senators.limiter = self.limiter
+        self.server.shutdown()
+        self.server.server_close()
+
+    def testFailedReportIsRetried(self, getTickerData):
+        failedLink = f"{self.server.url}/search/view/ptr/1/"
+
+        # The first run ingests the other reports, and stops the high-water mark at the report that failed
+        current()
+        self.assertFalse(ScrapedReport.objects.filter(ptrLink=failedLink).exists())
+        self.assertFalse(CongressTrade.objects.filter(ptrLink=failedLink).exists())
+        self.assertEqual(ScrapeState.objects.get(name='senate').highWaterMark, datetime.date(2012, 1, 2))
+
+        # The next run scrapes the report again once it can be parsed
+        self.server.pages = [self.report]
+        current()
+        self.assertTrue(ScrapedReport.objects.filter(ptrLink=failedLink).exists())
+        self.assertTrue(CongressTrade.objects.filter(ptrLink=failedLink).exists())
+        self.assertEqual(ScrapeState.objects.get(name='senate').highWaterMark, datetime.date(2012, 1, 3))
+
+    def testFailedReportIsRetriedByResume(self, getTickerData):
+        failedLink = f"{self.server.url}/search/view/ptr/1/"
+
+        # The backfill ingests the other reports, and keeps the checkpoint at the page of the report that failed
+        backfill(datetime.date(2012, 1, 1), endDate=datetime.date(2012, 1, 3))
+        checkpoint = ScrapeCheckpoint.objects.get()
+        self.assertEqual((checkpoint.offset, checkpoint.finished), (0, False))
+        self.assertFalse(ScrapedReport.objects.filter(ptrLink=failedLink).exists())
+
+        # Resuming scrapes the report again once it can be parsed
+        self.server.pages = [self.report]
+        backfill(resume=True)
+        checkpoint.refresh_from_db()
+        self.assertTrue(checkpoint.finished)
+        self.assertTrue(CongressTrade.objects.filter(ptrLink=failedLink).exists())
+
+# STAGED SCRAPE SHUTDOWN
+# The fetch and parse stages of a staged scrape have to stop when the caller stops early or a stage fails, instead of waiting on their queues forever
+class StagedScrapeTests(SimpleTestCase):
+    def setUp(self):
+        # Three pages of reports
+        self.server = FakeEfdsearch(reports=3 * senators.pageLength)
+        self.server.startInBackground()
+
+        self.limiter = senators.limiter
+        senators.useWebsite(self.server.url)
+        senators.limiter = RateLimiter(rate=1000, maxRate=1000)
+
+    def tearDown(self):
+        senators.useWebsite()
+        senators.limiter = self.limiter
+        self.server.shutdown()
+        self.server.server_close()
+
+    def testCallerStopsEarly(self):
+        threads = threading.active_count()
+
+        # Only take the first page, the other pages are still being fetched and parsed
+        pages = senators.scrape('01/01/2012', workers=2, parseWorkers=1)
+        reports, page, failed = next(pages)
+        pages.close()
+
+        self.assertEqual(len(reports), senators.pageLength)
+        self.assertEqual(threading.active_count(), threads)
+
+    def testParseStageFails(self):
+        # The error of the parse stage is raised to the caller instead of leaving it waiting for the next page
+        with mock.patch.object(senators, 'toPage', side_effect=ValueError('parse stage failed')):
+            with self.assertRaisesMessage(ValueError, 'parse stage failed'):
+                list(senators.scrape('01/01/2012', workers=2, parseWorkers=1))
+
+# SECTOR STATS
+# Updating the stats of the sectors and industries of the tickers that had new trades has to give the same stats as recomputing all of them
+class SectorStatTests(TestCase):
+    def setUp(self):
+        self.person = CongressPerson.objects.create(fullName='Person')
+        self.software = Ticker.objects.create(ticker='MSFT', sector='Technology', industry='Software')
+        self.bank = Ticker.objects.create(ticker='JPM', sector='Financial Services', industry='Banks')
+
+        # a trade of each ticker today, and one from before every windowed timeframe
+        today = datetime.date.today()
+        for ticker in (self.software, self.bank):
+            for days in (0, 200):
+                self.addTrade(ticker, today - datetime.timedelta(days=days))
+        updateSectorStats()
+
+    def addTrade(self, ticker, transactionDate):
+        CongressTrade.objects.create(name=self.person, ticker=ticker, transactionDate=transactionDate, transactionType='Purchase', amount='$1,001 - $15,000', amountMin=1001, amountMax=15000, owner='Self', ptrLink=f"https://efdsearch.senate.gov/{ticker.ticker}/{transactionDate}/", pdf=False)
+
+    def stats(self):
+        return sorted(SectorStat.objects.values_list('kind', 'name', 'timeframe', 'total', 'purchases', 'sales', 'sumMin', 'sumMax'))
+
+    def testChangedSectors(self):
+        self.addTrade(self.software, datetime.date.today() - datetime.timedelta(days=1))
+        updateSectorStats([self.software.id])
+        updated = self.stats()
+
+        updateSectorStats()
+        self.assertEqual(updated, self.stats())
+        self.assertIn(('sector', 'Technology', 0, 3, 3, 0, 3003, 45000), updated)
+
+    def testSectorEdited(self):
+        # the trades of the ticker move to its new sector and industry
+        ticker = Ticker.objects.get(ticker='MSFT')
+        ticker.sector = 'Communication Services'
+        ticker.industry = 'Internet Content'
+        ticker.save()
+        edited = self.stats()
+
+        self.assertNotIn('Technology', [name for kind, name, *totals in edited])
+        updateSectorStats()
+        self.assertEqual(edited, self.stats())
+
+# ROLLUPS
+# The rollups kept up to date at ingest, and rebuilt by the rebuildRollups command, have to match the totals of the transactions table
+@mock.patch('congress.populate.getTickerData', return_value=('Technology', 'Software', 'Company', 0, 'EQUITY'))
+class RollupTests(TestCase):
+    # Ingest trades of two congress people and two tickers on a few days, the same way the scraper does
+    def ingest(self):
+        rows = []
+        for i in range(40):
+            rows.append({
+                'Name': f"Person {i % 2}",
+                'Notification Date': '03/01/2022',
+                'Link': f"https://efdsearch.senate.gov/search/view/ptr/{i}/",
+                'Transaction Date': f"02/{i % 28 + 1:02}/2022",
+                'Owner': 'Self',
+                'Ticker': ['AAPL' if i % 3 else 'MSFT'],
+                'Asset Name': 'Company',
+                'Asset Type': 'Stock',
+                'Type': 'Purchase' if i % 2 else 'Sale (Full)',
+                'Amount': '$1,001 - $15,000' if i % 4 else '$15,001 - $50,000',
+                'Comment': '',
+            })
+        ingest(rows)
+
+    # Check the rollups against a direct GROUP BY over the transactions
+    def assertRollupsMatch(self):
+        totals = {'total': Count('id'), 'purchases': Count('id', filter=Q(transactionType='Purchase')), 'sales': Count('id', filter=Q(transactionType__startswith='Sale')), 'sumMin': Sum('amountMin'), 'sumMax': Sum('amountMax')}
+        fields = list(totals)
+
+        expected = {row['transactionDate']: [row[field] for field in fields] for row in CongressTrade.objects.order_by().values('transactionDate').annotate(**totals)}
+        self.assertEqual({rollup.date: [getattr(rollup, field) for field in fields] for rollup in DailyTradeRollup.objects.all()}, expected)
+
+        for model, field in ((TickerRollup, 'ticker'), (CongressPersonRollup, 'name')):
+            expected = {row[field]: [row[total] for total in fields] for row in CongressTrade.objects.order_by().values(field).annotate(**totals)}
+            # every trade is counted once in the weekly and once in the monthly rollups
+            for interval in ('week', 'month'):
+                rollups = model.objects.filter(interval=interval).order_by().values(field).annotate(**{total: Sum(total) for total in fields})
+                self.assertEqual({row[field]: [row[total] for total in fields] for row in rollups}, expected)
+
+    def testIngest(self, getTickerData):
+        self.ingest()
+        self.assertRollupsMatch()
+
+    def testRebuildAfterDelete(self, getTickerData):
+        self.ingest()
+        CongressTrade.objects.filter(ticker__ticker='MSFT').delete()
+
+        call_command('rebuildRollups', stdout=io.StringIO())
+        self.assertRollupsMatch()
+
+# KEYSET PAGINATION
+# Walking the pages with the cursor has to return every trade once, newest first, with trades of the same date ordered by id and trades without a date last
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        person = CongressPerson.objects.create(fullName='Person')
+
+        # three trades on the same day, two on the day before, and two without a transaction date
+        dates = [datetime.date(2022, 1, 2)] * 3 + [datetime.date(2022, 1, 1)] * 2 + [None] * 2
+        for i, date in enumerate(dates):
+            CongressTrade.objects.create(name=person, transactionDate=date, transactionType='Purchase', amount='', owner='Self', ptrLink=f"https://efdsearch.senate.gov/{i}/", pdf=False)
+
+        # newest first, then by id from the highest (every trade has its own report link, which is how the responses are compared)
+        cls.expected = [trade.ptrLink for trade in sorted(CongressTrade.objects.all(), key=lambda trade: (trade.transactionDate is not None, trade.transactionDate or datetime.date.min, trade.id), reverse=True)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    # Follow the next links from the first page, returns the report links of every trade in order
+    def walk(self, limit):
+        links = []
+        url = f'/government/congress-trades/?cursor=&limit={limit}'
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            links += [trade['ptrLink'] for trade in response.data['results']]
+            url = response.data['next']
+        return links
+
+    def testPages(self):
+        # page boundaries in the middle of the same day, at the change of day, and at the change to trades without a date
+        for limit in (1, 2, 3, 4, 5, 6, 7, 8):
+            self.assertEqual(self.walk(limit), self.expected)
+
+    def testInvalidCursor(self):
+        # not base64, without an id, with a date that does not exist, and with an id that is not a number
+        cursors = ['not a cursor'] + [base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii') for cursor in ('2022-01-02', '2022-13-45|1', '2022-01-02|id')]
+        for cursor in cursors:
+            self.assertEqual(self.client.get(f'/government/congress-trades/?cursor={cursor}').status_code, 404)
+
+    def testCursorWithOrdering(self):
+        self.assertEqual(self.client.get('/government/congress-trades/?cursor=&ordering=transactionDate').status_code, 400)
+        self.assertEqual(self.client.get('/government/congress-trades/?ordering=transactionDate').status_code, 200)
+
+# RESPONSE CACHE
+# Only the responses to the request itself are cached, and reports only with their table of transactions
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        senators.useCache(self.directory.name)
+        self.limiter = senators.limiter
+        senators.limiter = RateLimiter(rate=1000, maxRate=1000)
+
+    def tearDown(self):
+        senators.useCache(None)
+        senators.limiter = self.limiter
+        self.directory.cleanup()
+
+    # Fetch a report with a session that answers with response, returns if the response was cached
+    def fetchReport(self, response):
+        url = senators.prefixURL + '/search/view/ptr/1/'
+        session = mock.Mock()
+        session.post.return_value = mock.Mock(status_code=200, url=response.get('url', url), history=response.get('history', []), text=response['text'])
+
+        senators.fetch(url, {'csrfmiddlewaretoken': 'token'}, senators.reportURL, session)
+        return senators.cache.get(url, {}) is not None
+
+    def testReport(self):
+        self.assertTrue(self.fetchReport({'text': '<html><table></table></html>'}))
+
+    def testRedirectedToHomePage(self):
+        # the session expired and the website redirected to the home page
+        self.assertFalse(self.fetchReport({'text': '<html><table></table></html>', 'url': senators.homeURL, 'history': [mock.Mock(status_code=302)]}))
+
+    def testReportWithoutTable(self):
+        self.assertFalse(self.fetchReport({'text': '<html>Terms of service</html>'}))
+
+# REPORT PARSERS
+# Every parser has to return exactly the same rows, or fail on the same reports
+class ParserTests(SimpleTestCase):
+    # Report with a single transaction, whose asset name column is assetName
+    def report(self, assetName):
+        return f"""<html><body><table>
+            <tr><th>#</th><th>Transaction Date</th><th>Owner</th><th>Ticker</th><th>Asset Name</th><th>Asset Type</th><th>Type</th><th>Amount</th><th>Comment</th></tr>
+            <tr><td>1</td><td>01/20/2022</td><td>Self</td><td><a href="https://finance.yahoo.com/quote/MSFT">MSFT</a></td><td>{assetName}</td><td>Stock</td><td>Purchase</td><td>$1,001 - $15,000</td><td>--</td></tr>
+        </table></body></html>"""
+
+    # Rows every parser returns for html, or the type of the error it raised
+    def parse(self, html):
+        results = {}
+        for backend, parser in parsers.items():
+            try:
+                results[backend] = parser(html, 'Person', '01/21/2022', 'https://efdsearch.senate.gov/search/view/ptr/1/')
+            except Exception as e:
+                results[backend] = type(e)
+        return results
+
+    def assertSameRows(self, html):
+        results = self.parse(html)
+        self.assertEqual(len(set(map(repr, results.values()))), 1, results)
+        return results['bs4']
+
+    def testFixtures(self):
+        for path in sorted(fixturesDirectory.glob('*.html')):
+            with self.subTest(path.name):
+                self.assertIsInstance(self.assertSameRows(path.read_text(encoding='utf-8')), list)
+
+    def testAssetNameWithComment(self):
+        # the comment is skipped, the asset name is the text after it
+        rows = self.assertSameRows(self.report('<!-- asset -->Microsoft Corporation<div class="text-muted"><em>Option Type:</em> Call</div>'))
+        self.assertEqual(rows[0][6], ['Microsoft Corporation', ['Option Type: Call']])
+
+        self.assertSameRows(self.report('\n  <!-- asset -->Microsoft Corporation<div class="text-muted">Call</div>'))
+        self.assertSameRows(self.report('<!-- asset -->Microsoft Corporation <!-- end -->'))
+
+    def testAssetNameWithoutText(self):
+        # both parsers fail when the asset name column starts with an element
+        self.assertEqual(self.assertSameRows(self.report('<!-- asset --><div class="text-muted">Call</div>')), ValueError)
+        self.assertEqual(self.assertSameRows(self.report('<b>Microsoft</b> Corporation<div class="text-muted">Call</div>')), ValueError)
+
+# JSON ARRAY READER
+# Old transactions.json files are streamed one record at a time, whatever the size of the buffer
+class ReadJsonArrayTests(SimpleTestCase):
+    def testLeadingWhitespace(self):
+        # the first reads of the file only hold whitespace
+        records = list(readJsonArray(io.StringIO('\n' * 10 + ' [ {"Name": "A"}, {"Name": "B"} ]'), bufferSize=4))
+        self.assertEqual(records, [{'Name': 'A'}, {'Name': 'B'}])
+
+    def testNotAnArray(self):
+        for text in ('', '   \n', '{"Name": "A"}'):
+            with self.assertRaises(ValueError):
+                list(readJsonArray(io.StringIO(text), bufferSize=4))
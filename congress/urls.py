@@ -30,6 +30,15 @@ router.register(r'ticker-stats', views.TickerStatsViewSet, basename='tickerStats
 # Returns the summary stats for Ticker endpoint 
 router.register(r'congress-stats', views.CongressStatsViewSet, basename='congressStats')  
 
+# Returns the weekly or monthly time series of a stock ticker
+router.register(r'ticker-series', views.TickerSeriesViewSet, basename='tickerSeries')
+
+# Returns the weekly or monthly time series of a congress person
+router.register(r'congress-series', views.CongressSeriesViewSet, basename='congressSeries')
+
+# Returns the stats of every sector and industry
+router.register(r'sector-stats', views.SectorStatsViewSet, basename='sectorStats')
+
 # Wire up our API using automatic URL routing.
 urlpatterns = [
     path('government/', include(router.urls)),
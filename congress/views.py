@@ -8,22 +8,30 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework import viewsets, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework import filters
 
-from .serializers import CongressPersonSerializer, CongressTradeSerializer, SummaryStatSerializer, TickerSerializer
-from .models import CongressPerson, CongressTrade, Ticker, SummaryStat
+from .serializers import CongressPersonSerializer, CongressTradeSerializer, SummaryStatSerializer, TickerSerializer, TickerRollupSerializer, CongressPersonRollupSerializer, SectorStatSerializer
+from .serializers import tradeValues, serializeTrades, personValues, serializePeople
+from .cache import CachedResponseMixin
+from .pagination import KeysetPagination
+from .models import CongressPerson, CongressTrade, Ticker, SummaryStat, TickerRollup, CongressPersonRollup, SectorStat, rollupTotals, rollupIntervals
+
+import datetime
 
 # government/congress-trades endpoint - Mohammed Al-Rasheed
 # Returns all of the Congress Transactions
-class AllCongressViewSet(viewsets.ModelViewSet):
+class AllCongressViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     # Permission needed to access endpoint
     permission_classes = (permissions.AllowAny,)
     
-    # Querying database to get all the transactions objects
-    queryset = CongressTrade.objects.all()
+    # Querying database to get all the transactions objects, with their congress person and ticker in the same query (the serializer reads both)
+    queryset = CongressTrade.objects.select_related('name', 'ticker')
 
     # Serializing the data (converting to JSON)
     serializer_class = CongressTradeSerializer
+    # Limit/offset pagination, or keyset pagination when the cursor parameter is passed
+    pagination_class = KeysetPagination
 
     # Adding Logic to filter the data
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -32,12 +40,24 @@ class AllCongressViewSet(viewsets.ModelViewSet):
     # Searching by ticker, full name, and transaction type (buy/sell)
     search_fields = ['ticker__ticker', 'name__fullName', 'transactionType']
     # Ordering by results by transaction date (newest first)
+    # The keyset pagination always orders by transaction date and id, so the ordering parameter is rejected with a 400 when the cursor parameter is passed
     ordering = ['-transactionDate']
 
+    # Paginate and serialize the data with the fast path (see serializers.serializeTrades)
+    def list(self, request, *args, **kwargs):
+        # Get the filtered data as rows of values
+        result = tradeValues(self.filter_queryset(self.get_queryset()))
+
+        # Paginate the data
+        result_page = self.paginate_queryset(result)
+
+        # Return the serialized and paginated data
+        return self.get_paginated_response(serializeTrades(result_page))
+
 
 # government/congress-all endpoint - Farhan Rehman
 # Returns all of the Congress Peoples Profiles who have made at least one transaction
-class AllCongressPeopleViewSet(viewsets.ModelViewSet):
+class AllCongressPeopleViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     # Permission needed to access endpoint
     permission_classes = (permissions.AllowAny,)
     # Convering the data to JSON
@@ -52,15 +72,28 @@ class AllCongressPeopleViewSet(viewsets.ModelViewSet):
     # Searching by full name
     search_fields = ['fullName']
 
+    # Paginate and serialize the data with the fast path (see serializers.serializePeople)
+    def list(self, request, *args, **kwargs):
+        # Get the filtered data as rows of values
+        result = personValues(self.filter_queryset(self.get_queryset()))
+
+        # Paginate the data
+        result_page = self.paginate_queryset(result)
+
+        # Return the serialized and paginated data
+        return self.get_paginated_response(serializePeople(result_page))
+
 # government/ticker endpoint - Mohammed Al-Rasheed
 # Returns all of transactions that involved a specific ticker which is passed in the URL
-class TickerViewSet(viewsets.ModelViewSet):
+class TickerViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     # Permission needed to access endpoint
     permission_classes = (permissions.AllowAny,)
     # URL parameter passed into url that also exists in the CongressTrade and Ticker models 
     lookup_field = 'ticker'
     # Initiliazing our seializer class
     serializer_class = CongressTradeSerializer
+    # Limit/offset pagination, or keyset pagination when the cursor parameter is passed
+    pagination_class = KeysetPagination
 
 
     # filter by slug in url in django rest framework modelviewset
@@ -68,15 +101,12 @@ class TickerViewSet(viewsets.ModelViewSet):
         # replace dashes in ticker with periods
         tickerStr = self.kwargs['ticker'].replace('-', '.')
 
-        # Query Database for the ticker id  
-        ticker = Ticker.objects.get(ticker=tickerStr)
-        
         # accept transactions type and name parametes from the url in addition
         transactionType = self.request.query_params.get('transactionType')
         name = self.request.query_params.get('name')
         
-        # Query Database for all transactions using the ticker id
-        queryset = CongressTrade.objects.filter(ticker=ticker) 
+        # Query Database for all transactions of the ticker, with their congress person and ticker in the same query (the serializer reads both)
+        queryset = CongressTrade.objects.select_related('name', 'ticker').filter(ticker__ticker=tickerStr) 
         
         # Checks we need to run to see if we have a parameter for name
         if name is not None:
@@ -109,7 +139,7 @@ class TickerViewSet(viewsets.ModelViewSet):
 
 # government/congress-trades endpoint - Farhan Rehman
 # Returns all of the Congress Transactions
-class CongressPersonViewSet(viewsets.ModelViewSet):
+class CongressPersonViewSet(CachedResponseMixin, viewsets.ModelViewSet):
 
     # Permission needed to access endpoint
     permission_classes = (permissions.AllowAny,)
@@ -117,6 +147,8 @@ class CongressPersonViewSet(viewsets.ModelViewSet):
     lookup_field = 'fullName'
     # Initiliazing our seializer class
     serializer_class = CongressTradeSerializer
+    # Limit/offset pagination, or keyset pagination when the cursor parameter is passed
+    pagination_class = KeysetPagination
         
     # filter by slug in url in django rest framework modelviewset
     def get_queryset(self):
@@ -127,11 +159,8 @@ class CongressPersonViewSet(viewsets.ModelViewSet):
         transactionType = self.request.query_params.get('transactionType')
         ticker = self.request.query_params.get('ticker')
 
-        # Query Database for the name
-        congressPerson = CongressPerson.objects.get(fullName=fullName)
-
-        # Get all transactions by congress person
-        queryset = CongressTrade.objects.filter(name=congressPerson)
+        # Get all transactions by congress person, with their congress person and ticker in the same query (the serializer reads both)
+        queryset = CongressTrade.objects.select_related('name', 'ticker').filter(name__fullName=fullName)
     
         # Checks we need to run to see if we have a parameter for ticker
         if ticker is not None:
@@ -165,7 +194,7 @@ class CongressPersonViewSet(viewsets.ModelViewSet):
         return self.get_paginated_response(serializer.data)
 
 # government/ticker endpoint - Mohammed Al-Rasheed
-class TickerStatsViewSet(viewsets.ModelViewSet):
+class TickerStatsViewSet(CachedResponseMixin, viewsets.ModelViewSet):
 # Permission needed to access endpoint
     permission_classes = (permissions.AllowAny,)
     # URL parameter passed into url that also exists in the CongressTrade and CongressPerson models 
@@ -200,7 +229,7 @@ class TickerStatsViewSet(viewsets.ModelViewSet):
         return self.get_paginated_response(serializer.data)
 
 # government/congress-stats - Farhan Rehman
-class CongressStatsViewSet(viewsets.ModelViewSet):
+class CongressStatsViewSet(CachedResponseMixin, viewsets.ModelViewSet):
 # Permission needed to access endpoint
     permission_classes = (permissions.AllowAny,)
     # URL parameter passed into url that also exists in the CongressTrade and CongressPerson models 
@@ -233,8 +262,87 @@ class CongressStatsViewSet(viewsets.ModelViewSet):
         return self.get_paginated_response(serializer.data)
 
 
+# Interval of a time series, passed with the interval parameter ("week" or "month", monthly when there is none)
+def seriesInterval(request):
+    interval = request.query_params.get('interval') or 'month'
+
+    if interval not in rollupIntervals:
+        raise ValidationError({'interval': f"The interval has to be one of: {', '.join(rollupIntervals)}"})
+
+    return interval
+
+# government/ticker-series endpoint
+# Returns the number of transactions, purchases, sales and volume of a ticker in every week or month (government/ticker-series/<ticker>/?interval=week)
+# The whole time series is returned in a single response (it is not paginated), it comes from the rollups that are updated at ingest
+class TickerSeriesViewSet(CachedResponseMixin, viewsets.GenericViewSet):
+    # Permission needed to access endpoint
+    permission_classes = (permissions.AllowAny,)
+    # URL parameter passed into url that also exists in the Ticker model
+    lookup_field = 'ticker'
+    # Initiliazing our seializer class
+    serializer_class = TickerRollupSerializer
+
+    # filter by slug in url in django rest framework modelviewset
+    def get_queryset(self):
+        # replace dashes in ticker with periods
+        tickerStr = self.kwargs['ticker'].replace('-', '.')
+
+        # Query Database for the rollups of the ticker, oldest period first
+        return TickerRollup.objects.filter(ticker__ticker=tickerStr, interval=seriesInterval(self.request)).order_by('periodStart')
+
+    # Serialize the data
+    def retrieve(self, request, *args, **kwargs):
+        serializer = TickerRollupSerializer(self.get_queryset(), many=True)
+
+        return Response({'ticker': self.kwargs['ticker'], 'interval': seriesInterval(request), 'results': serializer.data})
+
+# government/congress-series endpoint
+# Returns the number of transactions, purchases, sales and volume of a congress person in every week or month (government/congress-series/<fullName>/?interval=week)
+# The whole time series is returned in a single response (it is not paginated), it comes from the rollups that are updated at ingest
+class CongressSeriesViewSet(CachedResponseMixin, viewsets.GenericViewSet):
+    # Permission needed to access endpoint
+    permission_classes = (permissions.AllowAny,)
+    # URL parameter passed into url that also exists in the CongressPerson model
+    lookup_field = 'fullName'
+    # Initiliazing our seializer class
+    serializer_class = CongressPersonRollupSerializer
+
+    # filter by slug in url in django rest framework modelviewset
+    def get_queryset(self):
+        # Get the name that was passed in the URL
+        fullName = self.kwargs['fullName']
+
+        # Query Database for the rollups of the congress person, oldest period first
+        return CongressPersonRollup.objects.filter(name__fullName=fullName, interval=seriesInterval(self.request)).order_by('periodStart')
+
+    # Serialize the data
+    def retrieve(self, request, *args, **kwargs):
+        serializer = CongressPersonRollupSerializer(self.get_queryset(), many=True)
+
+        return Response({'fullName': self.kwargs['fullName'], 'interval': seriesInterval(request), 'results': serializer.data})
+
+# government/sector-stats endpoint
+# Returns the number of transactions, purchases, sales and volume of every sector and industry (government/sector-stats/?kind=sector&timeframe=30)
+# The stats are recomputed after every ingest, so the endpoint only reads the precomputed rows
+class SectorStatsViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    # Permission needed to access endpoint
+    permission_classes = (permissions.AllowAny,)
+    # Querying database for the stats of every sector and industry, most traded first
+    queryset = SectorStat.objects.all().order_by('-total', 'name')
+    # Convering the data to JSON
+    serializer_class = SectorStatSerializer
+
+    # Adding Logic to filter the data
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    # Filtering by kind (sector or industry), name and timeframe (0 is every transaction)
+    filterset_fields = ['kind', 'name', 'timeframe']
+    # Ordering by number of transactions, purchases, sales or name
+    ordering_fields = ['total', 'purchases', 'sales', 'name']
+
 # government/summary-stats endpoint - Farhan Rehman
-class SummaryStatsViewSet(viewsets.ModelViewSet):
+# Returns the summary stats of the transactions made in the last "timeframe" days (government/summary-stats/<timeframe>/), or from "start" to "end" (government/summary-stats/?start=YYYY-MM-DD&end=YYYY-MM-DD)
+# Timeframes that do not have a SummaryStat object are calculated from the daily rollups
+class SummaryStatsViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     # Permission needed to access endpoint
     permission_classes = (permissions.AllowAny,)
     # URL parameter passed into url that also exists in the CongressTrade and CongressPerson models 
@@ -244,8 +352,11 @@ class SummaryStatsViewSet(viewsets.ModelViewSet):
     
     # filter by slug in url in django rest framework modelviewset
     def get_queryset(self):
-        # Get the timeframe that was passed in the URL
-        timeframe = self.kwargs['timeframe']
+        # Get the timeframe that was passed in the URL, every summary stat is returned when there is none
+        timeframe = self.kwargs.get('timeframe')
+
+        if timeframe is None:
+            return SummaryStat.objects.all().order_by('timeframe')
 
         # Query Database for the timeframe by timeframe name
         queryset = SummaryStat.objects.filter(timeframe=timeframe)
@@ -253,12 +364,8 @@ class SummaryStatsViewSet(viewsets.ModelViewSet):
         # return queryset
         return queryset
 
-
-    # Serialize and Paginate the data    
-    def retrieve(self, request, *args, **kwargs):
-        # Get the queried data
-        result = self.get_queryset()
-
+    # Serialize and Paginate a list of summary stats
+    def paginatedResponse(self, result):
         # Paginate the data
         result_page = self.paginate_queryset(result)
         
@@ -267,3 +374,53 @@ class SummaryStatsViewSet(viewsets.ModelViewSet):
 
         # Return the serialized and paginated data
         return self.get_paginated_response(serializer.data)
+
+    # Serialize and Paginate the data    
+    def retrieve(self, request, *args, **kwargs):
+        # The timeframe has to be a positive number of days
+        try:
+            timeframe = int(self.kwargs['timeframe'])
+        except ValueError:
+            raise ValidationError({'timeframe': 'The timeframe has to be a number of days'})
+        if timeframe <= 0:
+            raise ValidationError({'timeframe': 'The timeframe has to be a positive number of days'})
+
+        # The timeframe can not start before the first day a date can have
+        today = datetime.date.today()
+        if timeframe > (today - datetime.date.min).days + 1:
+            raise ValidationError({'timeframe': 'The timeframe is too long'})
+
+        # Get the queried data
+        result = list(self.get_queryset())
+
+        # Calculate the summary stats of timeframes that are not stored from the daily rollups (they are not saved)
+        if len(result) == 0:
+            result = [SummaryStat(timeframe=timeframe, **rollupTotals(today - datetime.timedelta(days=timeframe - 1), today))]
+
+        return self.paginatedResponse(result)
+
+    # Serialize and Paginate every summary stat, or the summary stats of the date range passed with the start and end parameters
+    def list(self, request, *args, **kwargs):
+        start = self.request.query_params.get('start')
+        end = self.request.query_params.get('end')
+
+        # Return every stored summary stat when there is no date range
+        if not start and not end:
+            return self.paginatedResponse(self.get_queryset())
+
+        # Dates are in the YYYY-MM-DD format, the date range ends today when there is no end date
+        try:
+            startDate = datetime.date.fromisoformat(start) if start else None
+            endDate = datetime.date.fromisoformat(end) if end else datetime.date.today()
+        except ValueError:
+            raise ValidationError({'start': 'Dates have to be in the YYYY-MM-DD format'})
+
+        if startDate is None:
+            raise ValidationError({'start': 'A start date is required'})
+        if startDate > endDate:
+            raise ValidationError({'start': 'The start date has to be before the end date'})
+
+        # The timeframe is the number of days in the date range (both dates included)
+        result = [SummaryStat(timeframe=(endDate - startDate).days + 1, **rollupTotals(startDate, endDate))]
+
+        return self.paginatedResponse(result)